@@ -0,0 +1,144 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from instrumentation import TimedHTTPConnectionPool, TimedHTTPSConnectionPool
+from retry import CircuitOpenError
+
+# Транспорт клиента PetFriends: адаптер requests с пулом соединений, повторами, предохранителем,
+# ограничением частоты и кассетой. Вынесен из api, чтобы requests и urllib3 загружались только
+# при первом запросе клиента (PetFriends.session), а не при импорте api.
+
+
+class _CountingPoolMixin:
+    """Пул urllib3, который считает открытые сокеты (num_sockets). num_connections urllib3 считает только
+    объекты соединений, а без keep-alive один объект заново открывает сокет на каждый запрос"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_sockets = 0
+        self._sockets_lock = threading.Lock()
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        open_socket = conn._new_conn
+
+        def counted_open():
+            with self._sockets_lock:
+                self.num_sockets += 1
+            return open_socket()
+
+        conn._new_conn = counted_open
+        return conn
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, TimedHTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, TimedHTTPSConnectionPool):
+    pass
+
+
+class PooledAdapter(HTTPAdapter):
+    """Адаптер requests с пулом keep-alive соединений. Считает, сколько соединений было открыто
+    и сколько запросов ушло по уже открытым (переиспользованным) соединениям"""
+
+    def __init__(self, *args, retry_policy=None, circuit_breaker=None, rate_limiter=None, cassette=None,
+                 **kwargs):
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.cassette = cassette
+        self.circuit_breaker = circuit_breaker
+        self._stats_lock = threading.Lock()
+        # счетчики пулов, которые уже закрыты или вытеснены из PoolManager
+        self._disposed = {'opened': 0, 'requests': 0}
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # соединения, которые умеют записывать время DNS/TCP/TLS в замеры вызова, со счетчиком сокетов
+        self.poolmanager.pool_classes_by_scheme = {'http': CountingHTTPConnectionPool,
+                                                   'https': CountingHTTPSConnectionPool}
+        # пулы хостов вытесняются при превышении pool_connections - забираем их счетчики перед закрытием
+        self.poolmanager.pools.dispose_func = self._dispose_pool
+
+    def _dispose_pool(self, pool) -> None:
+        with self._stats_lock:
+            self._disposed['opened'] += pool.num_sockets
+            self._disposed['requests'] += pool.num_requests
+        pool.close()
+
+    def send(self, request, **kwargs):
+        """Отправка с повторами (retry_policy), предохранителем (circuit_breaker),
+        ограничением частоты (rate_limiter) и кассетой записи/воспроизведения (cassette), если они заданы"""
+        policy, breaker = self.retry_policy, self.circuit_breaker
+        if policy is None and breaker is None:
+            return self._send_once(request, **kwargs)
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f'Circuit breaker is open for {request.url}', request=request)
+            # тело-поток (фото) после отправки не перечитать - такие запросы повторяем только до соединения
+            replayable = not hasattr(request.body, 'read')
+            try:
+                response = self._send_once(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if breaker is not None:
+                    breaker.record_failure()
+                if policy is None or not policy.should_retry(request.method, attempt, error=e, replayable=replayable):
+                    raise
+                delay = policy.backoff(attempt)
+            except BaseException:
+                # любая другая ошибка тоже завершает попытку - иначе пробный запрос полуоткрытого
+                # предохранителя остался бы "в полете" навсегда и все следующие запросы отклонялись бы
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            else:
+                if breaker is not None:
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if policy is None or not policy.should_retry(request.method, attempt, status=response.status_code,
+                                                             replayable=replayable):
+                    return response
+                delay = policy.backoff(attempt, response)
+                response.close()
+            attempt += 1
+            call = instrumentation.current_call()
+            if call is not None:
+                call.retries += 1
+            time.sleep(delay)
+
+    def _send_once(self, request, **kwargs):
+        cassette = self.cassette
+        if cassette is not None:
+            key = cassette.request_key(request)
+            response = cassette.play(key, request)
+            if response is not None:
+                return response
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(request.url)
+        response = super().send(request, **kwargs)
+        if cassette is not None:
+            cassette.record(key, response)
+        return response
+
+    def connection_stats(self) -> dict:
+        """Возвращает словарь со счетчиками: opened - открыто новых соединений,
+        reused - запросов по переиспользованным соединениям, requests - всего запросов"""
+        with self._stats_lock:
+            opened = self._disposed['opened']
+            total = self._disposed['requests']
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_sockets
+                total += pool.num_requests
+        return {'opened': opened, 'reused': max(total - opened, 0), 'requests': total}
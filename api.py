@@ -1,211 +1,321 @@
 
-import json
-import requests
-import functools
-
-# Этот декоратор в целом хорош. он будет выдавать параметры реквеста, если переписать методы так,
-# Чтобы все параметры, включая урл задавались в качестве аргументов функции. возможно к этому я еще вернусь,
-# Главное - понял :)
-
-def log_api(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # url = kwargs.get('url', {})
-        # headers = kwargs.get('headers', {})
-        # data = kwargs.get('data', {})
-        # params = kwargs.get('params', {})
-        #
-        # # Log request information
-        # with open('log.txt', 'a') as f:
-        #     f.write(f'\n--- Request ---\n')
-        #     if url:
-        #         f.write(f'\nUrl: {url}')
-        #     if headers:
-        #         f.write(f'\nHeaders: {headers}')
-        #     if params:
-        #         f.write(f'\nParams: {params}')
-        #     if data:
-        #         f.write(f'\nData: {data}')
-
-
-        # Делаем запрос используя оригинальную функцию
-        response = func(*args, **kwargs)
-
-        # Логируем параметры ответа
-        if isinstance(response, tuple):
-            status, result = response
-        else:
-            status, result = response.status_code, response.text
-
-        with open('log.txt', 'a') as f:
-            f.write(f'\n--- Response ---\n')
-            if hasattr(response, 'Response'):
-                f.write(f'Method: {response.request.method}\n')
-            f.write(f'Status: {status}\n')
-            f.write(f'Response: {result}\n')
+import threading
+import time
+from typing import TYPE_CHECKING
 
-        return response
+import log_writer
+from pet_registry import PetRegistry
+from pipeline import ApiCall, Pipeline
+from singleflight import SingleFlight
+
+if TYPE_CHECKING:  # bulk тянет concurrent.futures - в рантайме импортируется при первой пакетной операции
+    from bulk import BatchResult
+
+# requests, urllib3 и адаптер с пулом соединений (adapter.py) загружаются при первом запросе клиента,
+# а не при импорте api - короткоживущие процессы, которые только импортируют api или создают клиента,
+# за них не платят. Что они не грузятся при импорте, проверяет tests/test_import_time.py
 
-    return wrapper
+
+def __getattr__(name):
+    # api.PooledAdapter по-прежнему доступен, но модуль adapter грузится только при обращении
+    if name == 'PooledAdapter':
+        from adapter import PooledAdapter
+        return PooledAdapter
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 # функция, которая логирует параметры запроса. С помощью нее вывожу Request. Применяю внутри API методов.
+# Файл не открывается на каждый вызов - текст уходит в буферизованный фоновый писатель (см. log_writer)
 def append_to_file(filename: str, content: str) -> None:
-    with open(filename, 'a') as file:
-        file.write(content)
+    log_writer.append(filename, content)
 
 
 class PetFriends:
-    """апи библиотека к веб приложению Pet Friends"""
-
-    def __init__(self):
-        self.base_url = "https://petfriends.skillfactory.ru/"
+    """апи библиотека к веб приложению Pet Friends
+
+    Все запросы идут через общую сессию с пулом keep-alive соединений:
+    pool_connections - сколько хостов держать в пуле, pool_maxsize - лимит соединений на один хост,
+    pool_block - ждать свободное соединение вместо открытия лишнего сверх лимита.
+    Клиент нужно закрывать методом close() или использовать как контекстный менеджер.
+
+    key_cache - необязательный key_cache.ApiKeyCache: get_api_key берет ключ из кэша,
+    а ключи, на которые сервер ответил 403, из кэша удаляются.
+
+    retry_policy - retry.RetryPolicy: повторы при 5xx/429 и сетевых ошибках с экспоненциальной задержкой,
+    POST без гарантии, что запрос не дошел до сервера, не повторяется.
+    circuit_breaker - retry.CircuitBreaker: пока сервер нездоров, запросы сразу падают с CircuitOpenError.
+    rate_limiter - rate_limit.RateLimiter: ограничение частоты запросов по эндпоинтам, в том числе общее
+    для нескольких процессов (RateLimiter(..., path=файл)).
+    response_cache - response_cache.ResponseCache: get_list_of_pets отдает повторные ответы из кэша
+    (устаревшие перепроверяет по ETag/Last-Modified), методы, меняющие питомцев, сбрасывают кэш своего ключа.
+    photo_preprocessor - photo_prep.PhotoPreprocessor: фото перед загрузкой уменьшаются, пережимаются
+    и очищаются от метаданных (нужен Pillow), результат кэшируется на диске по хэшу содержимого.
+    cassette - cassette.Cassette: запись трафика клиента или воспроизведение ответов без сети.
+    single_flight=True - одинаковые одновременные get_api_key / get_list_of_pets из разных потоков
+    выполняются одним запросом (singleflight.SingleFlight, счетчики - pf.single_flight.stats()).
+    Если не задан ни cassette, ни base_url, берется кассета по умолчанию PetFriends.cassette.
+
+    Питомцы, созданные через клиент, учитываются в реестре created (pet_registry.PetRegistry):
+    cleanup() удаляет их пачками, sweep() убирает остатки по префиксу имени или возрасту.
+
+    Все методы запросов выполняются через конвейер pipeline.Pipeline (pf.pipeline): авторизация, лог,
+    замеры, кэши, разбор ответа - общие стадии, а не код каждого метода.
+
+    Методы, возвращающие питомцев, принимают as_records=True - тогда при статусе 200 результат
+    будет models.Pet (или models.PetList для списка) вместо словарей"""
+
+    # адрес по умолчанию для всех клиентов; тесты подменяют его на адрес локального фейкового сервера
+    base_url = "https://petfriends.skillfactory.ru/"
+    # кассета по умолчанию для клиентов, работающих с base_url по умолчанию (pytest --cassette)
+    cassette = None
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, key_cache=None, base_url: str = None, retry_policy=None,
+                 circuit_breaker=None, rate_limiter=None, response_cache=None, photo_preprocessor=None,
+                 cassette=None, single_flight: bool = False):
+        if base_url is not None:
+            self.base_url = base_url
+        elif cassette is None:
+            cassette = self.cassette
+        self.cassette = cassette
+        # сессия и адаптер создаются при первом запросе (свойство session)
+        self._adapter_options = dict(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                     pool_block=pool_block, retry_policy=retry_policy,
+                                     circuit_breaker=circuit_breaker, rate_limiter=rate_limiter,
+                                     cassette=cassette)
+        self._keep_alive = keep_alive
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.adapter = None
+        # instrumentation.Instrumentation появляется с первым add_hook, до этого замеры не ведутся
+        self.instrumentation = None
+        self.key_cache = key_cache
+        self.response_cache = response_cache
+        self.photo_preprocessor = photo_preprocessor
+        self.single_flight = SingleFlight() if single_flight else None
+        # id питомцев, созданных через этот клиент, - для cleanup()
+        self.created = PetRegistry()
+        # все публичные методы выполняются через один конвейер стадий (pipeline.STAGES)
+        self.pipeline = Pipeline(self)
+
+    @property
+    def session(self):
+        """requests.Session с пулом соединений (adapter.PooledAdapter); создается при первом обращении"""
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._connect()
+                session = self._session
+        return session
+
+    def _connect(self):
+        import requests
+
+        import instrumentation
+        from adapter import PooledAdapter
+
+        self.adapter = PooledAdapter(**self._adapter_options)
+        session = requests.Session()
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        if not self._keep_alive:
+            session.headers['Connection'] = 'close'
+        # метод, url, статус и размеры запроса/ответа для структурированного лога
+        session.hooks['response'].append(log_writer.note_response)
+        session.hooks['response'].append(instrumentation.note_response)
+        if self.key_cache is not None:
+            session.hooks['response'].append(self._invalidate_rejected_key)
+        return session
+
+    def close(self) -> None:
+        """Закрывает сессию и все соединения пула (если клиент успел их открыть)"""
+        if self._session is not None:
+            self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def connection_stats(self) -> dict:
+        """Счетчики открытых и переиспользованных соединений пула"""
+        if self.adapter is None:
+            return {'opened': 0, 'reused': 0, 'requests': 0}
+        return self.adapter.connection_stats()
+
+    def add_hook(self, pre=None, post=None):
+        """Регистрирует хуки инструментирования: pre(call) до запроса и post(call) после него,
+        call - instrumentation.CallMetrics с именем метода, статусом, временами DNS/connect/TLS/TTFB/total,
+        размерами запроса и ответа и числом повторов. Возвращает значение для remove_hook().
+        Встроенная агрегация в гистограммы - instrumentation.LatencyHistograms"""
+        if self.instrumentation is None:
+            import instrumentation
+            self.instrumentation = instrumentation.Instrumentation()
+        return self.instrumentation.add(pre, post)
+
+    def remove_hook(self, handle) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.remove(handle)
+
+    def _invalidate_rejected_key(self, response, *args, **kwargs):
+        # хук ответа: сервер не принял ключ или учетные данные - убираем их из кэша
+        if response.status_code == 403:
+            headers = response.request.headers
+            if 'auth_key' in headers:
+                self.key_cache.invalidate_key(headers['auth_key'])
+            if 'email' in headers:
+                self.key_cache.invalidate(headers['email'], headers.get('password', ''))
+        return response
 
-    @log_api
-    def get_api_key(self, email: str, passwd: str) -> json:
+    def get_api_key(self, email: str, passwd: str) -> tuple:
         """Метод делает запрос к API сервера и возвращает статус запроса и результат в формате
         JSON с уникальным ключем пользователя, найденного по указанным email и паролем"""
-
         headers = {
             'email': email,
             'password': passwd,
         }
-        url = self.base_url+'api/key'
-        res = requests.get(url, headers=headers)
-        status = res.status_code
-        result = ""
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-
-    @log_api
-    def get_list_of_pets(self, auth_key: json, filter: str = "") -> json:
+        return self.pipeline.execute(ApiCall('get_api_key', 'GET', 'api/key', headers=headers, cache='key'))
+
+    def get_list_of_pets(self, auth_key: dict, filter: str = "", as_records: bool = False) -> tuple:
         """Метод делает запрос к API сервера и возвращает статус запроса и результат в формате JSON
         со списком наденных питомцев, совпадающих с фильтром. На данный момент фильтр может иметь
         либо пустое значение - получить список всех питомцев, либо 'my_pets' - получить список
         собственных питомцев"""
+        return self.pipeline.execute(ApiCall('get_list_of_pets', 'GET', 'api/pets', auth_key,
+                                             params={'filter': filter}, cache='pets',
+                                             records='list' if as_records else None))
 
-        headers = {'auth_key': auth_key['key']}
-        filter = {'filter': filter}
-
-        url = self.base_url + 'api/pets'
-        res = requests.get(url, headers=headers, params=filter)
-        status = res.status_code
-        result = ""
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nParams: {filter}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-    @log_api
-    def add_new_pet(self, auth_key: json, name: str, animal_type: str, age: str,
-                    pet_photo: str) -> json:
+    def add_new_pet(self, auth_key: dict, name: str, animal_type: str, age: str,
+                    pet_photo, as_records: bool = False) -> tuple:
         """Метод постит информацию о новом питомце на сервере,
-        возвращает статус запроса и JSON с данными питомца"""
+        возвращает статус запроса и JSON с данными питомца.
+        pet_photo - путь к файлу, bytes или открытый бинарный файл"""
         data = {
             'name': name,
             'animal_type': animal_type,
             'age': age,
         }
-        headers = {'auth_key': auth_key['key']}
-        file = {'pet_photo': (pet_photo, open(pet_photo, 'rb'), 'image/jpeg')}
-
-        url = self.base_url + 'api/pets'
-        res = requests.post(url, headers=headers, data=data, files=file)
-        status = res.status_code
-        result = ''
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nData: {data}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-    @log_api
-    def delete_pet(self, auth_key: json, pet_id: str) -> json:
+        return self.pipeline.execute(ApiCall('add_new_pet', 'POST', 'api/pets', auth_key, data=data,
+                                             files={'pet_photo': pet_photo}, creates=True,
+                                             records='pet' if as_records else None))
+
+    def delete_pet(self, auth_key: dict, pet_id: str) -> tuple:
         """Метод удаляет питомца по ID и возвращает статус запроса
         и результат в формате JSON с текстом уведомления о успешном удалении"""
-        headers = {'auth_key': auth_key['key']}
-
-        url = self.base_url + f'api/pets/{pet_id}'
-        res = requests.delete(url, headers=headers)
-        status = res.status_code
-        result = ''
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-    @log_api
-    def update_pet_info(self, auth_key: json, pet_id: str, name: str, animal_type: str, age: str):
+        return self.pipeline.execute(ApiCall('delete_pet', 'DELETE', f'api/pets/{pet_id}', auth_key,
+                                             deletes=True, pet_id=pet_id))
+
+    def update_pet_info(self, auth_key: dict, pet_id: str, name: str, animal_type: str, age: str,
+                        as_records: bool = False):
         """Метод обновляет информацию о питомце по его ID и возвращает статус запроса
         и результат в формате JSON с обновленными данными питомца"""
-        headers = {'auth_key': auth_key['key']}
         data = {
             'name': name,
             'animal_type': animal_type,
             'age': age
         }
-        url = self.base_url + f'api/pets/{pet_id}'
-        res = requests.put(url, headers=headers, data=data)
-        status = res.status_code
-        result = ''
-
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nData: {data}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-    @log_api
-    def add_new_pet_without_photo(self, auth_key: json, name: str,
-                                  animal_type: str, age: str) -> json:
+        return self.pipeline.execute(ApiCall('update_pet_info', 'PUT', f'api/pets/{pet_id}', auth_key, data=data,
+                                             pet_id=pet_id, records='pet' if as_records else None))
+
+    def add_new_pet_without_photo(self, auth_key: dict, name: str,
+                                  animal_type: str, age: str, as_records: bool = False) -> tuple:
         """Метод добавляет нового пета без изображения, на выходе - статус запроса
         и json с данными нового питомца"""
-        headers = {'auth_key': auth_key['key']}
         data = {
             'name': name,
             'animal_type': animal_type,
             'age': age
         }
+        return self.pipeline.execute(ApiCall('add_new_pet_without_photo', 'POST', 'api/create_pet_simple', auth_key,
+                                             data=data, creates=True, records='pet' if as_records else None))
 
-        url = self.base_url + 'api/create_pet_simple'
-        res = requests.post(url, headers=headers, data=data)
-        status = res.status_code
-        result = ''
-
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nData: {data}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-    @log_api
-    def add_pet_photo(self, auth_key: json, pet_id: str, pet_photo: str):
+    def add_pet_photo(self, auth_key: dict, pet_id: str, pet_photo, as_records: bool = False):
         """Метод добавляет фото к существующему пету без фото возвращает статус запроса
-        и результат в формате JSON"""
-        headers = {'auth_key': auth_key['key']}
-        file = {'pet_photo': (pet_photo, open(pet_photo, 'rb'), 'image/jpeg')}
-
-        url = self.base_url + f'api/pets/set_photo/{pet_id}'
-        res = requests.post(url, headers=headers, files=file)
-        status = res.status_code
-        result = ''
-
-        append_to_file('log.txt', f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}')
-        try:
-            result = res.json()
-        except json.decoder.JSONDecodeError:
-            result = res.text
-        return status, result
-
-
+        и результат в формате JSON. pet_photo - путь к файлу, bytes или открытый бинарный файл"""
+        return self.pipeline.execute(ApiCall('add_pet_photo', 'POST', f'api/pets/set_photo/{pet_id}', auth_key,
+                                             files={'pet_photo': pet_photo}, pet_id=pet_id,
+                                             records='pet' if as_records else None))
+
+
+
+    # Пакетные операции. Выполняются в пуле потоков на общей сессии клиента, результат - bulk.BatchResult:
+    # итерация отдает BatchItem по мере готовности, stats() - итоги и пропускная способность.
+    # Размер пула соединений (pool_maxsize) стоит держать не меньше max_workers.
+
+    @staticmethod
+    def _batch(func, items, max_workers: int) -> 'BatchResult':
+        # bulk тянет concurrent.futures - грузим его только когда пакетные операции действительно нужны
+        from bulk import BatchResult
+        return BatchResult(func, items, max_workers)
+
+    def add_pets(self, auth_key: dict, pets, max_workers: int = 8) -> 'BatchResult':
+        """Добавляет питомцев из итерируемого набора словарей с ключами name, animal_type, age
+        и необязательным pet_photo (без фото питомец создается через add_new_pet_without_photo)"""
+        def add(pet):
+            if pet.get('pet_photo') is not None:
+                return self.add_new_pet(auth_key, pet['name'], pet['animal_type'], pet['age'], pet['pet_photo'])
+            return self.add_new_pet_without_photo(auth_key, pet['name'], pet['animal_type'], pet['age'])
+
+        return self._batch(add, pets, max_workers)
+
+    def update_pets(self, auth_key: dict, updates, max_workers: int = 8) -> 'BatchResult':
+        """Обновляет питомцев из итерируемого набора словарей с ключами pet_id, name, animal_type, age"""
+        def update(pet):
+            return self.update_pet_info(auth_key, pet['pet_id'], pet['name'], pet['animal_type'], pet['age'])
+
+        return self._batch(update, updates, max_workers)
+
+    def delete_pets(self, auth_key: dict, pet_ids, max_workers: int = 8) -> 'BatchResult':
+        """Удаляет питомцев по списку ID"""
+        return self._batch(lambda pet_id: self.delete_pet(auth_key, pet_id), pet_ids, max_workers)
+
+    def cleanup(self, max_workers: int = 8) -> dict:
+        """Удаляет всех питомцев, созданных через этот клиент и еще не удаленных, параллельно пачками.
+        Питомцы, которых удалить не удалось, остаются в реестре для следующего cleanup().
+        Возвращает {'total', 'succeeded', 'failed'}"""
+        totals = {'total': 0, 'succeeded': 0, 'failed': 0}
+        for api_key, pet_ids in self.created.take().items():
+            batch = self.delete_pets({'key': api_key}, pet_ids, max_workers).wait()
+            for item in batch.items:
+                if not item.ok:
+                    self.created.add(api_key, item.item)
+            stats = batch.stats()
+            for name in totals:
+                totals[name] += stats[name]
+        return totals
+
+    def sweep(self, auth_key: dict, prefix: str = None, older_than: float = None,
+              max_workers: int = 8) -> 'BatchResult':
+        """Удаляет своих питомцев (my_pets), у которых имя начинается с prefix и/или которые созданы
+        больше older_than секунд назад - например, оставшихся от упавших прогонов.
+        Без prefix и older_than ничего не удаляет. Возвращает выполненный BatchResult"""
+        def matches(pet) -> bool:
+            if prefix is None and older_than is None:
+                return False
+            if prefix is not None and not str(pet.get('name') or '').startswith(prefix):
+                return False
+            if older_than is not None:
+                try:
+                    created_at = float(pet.get('created_at'))
+                except (TypeError, ValueError):
+                    return False  # возраст неизвестен - не трогаем
+                if now - created_at < older_than:
+                    return False
+            return True
+
+        now = time.time()
+        pet_ids = [pet['id'] for pet in self.iter_pets(auth_key, 'my_pets') if matches(pet)]
+        return self.delete_pets(auth_key, pet_ids, max_workers).wait()
+
+    def iter_pets(self, auth_key: dict, filter: str = "", stop_at_id: str = None, chunk_size: int = 64 * 1024,
+                  as_records: bool = False):
+        """Генератор питомцев из ответа api/pets: тело читается и разбирается кусками по chunk_size,
+        питомцы отдаются по одному, весь список в памяти не держится.
+        stop_at_id - остановиться (и закрыть соединение), как только найден питомец с этим id.
+        as_records=True - отдавать models.Pet вместо словарей.
+        При статусе ответа, отличном от 200, выбрасывается requests.HTTPError"""
+        _, pets = self.pipeline.execute(ApiCall('iter_pets', 'GET', 'api/pets', auth_key, params={'filter': filter},
+                                                stream=chunk_size, records='pet' if as_records else None))
+        pets.stop_at_id = stop_at_id
+        yield from pets
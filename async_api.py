@@ -0,0 +1,183 @@
+import asyncio
+import functools
+
+import json_codec
+import log_writer
+from api import PetFriends, append_to_file
+from multipart import MultipartEncoder
+from singleflight import AsyncSingleFlight
+
+
+def alog_api(func):
+    """Асинхронный аналог стадии log конвейера PetFriends (pipeline.log) - логирует статус
+    и тело ответа одной записью вместе с запросом"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with log_writer.record():
+            status, result = await func(*args, **kwargs)
+            append_to_file(log_writer.config.filename,
+                           f'\n--- Response ---\nStatus: {status}\nResponse: {log_writer.truncate(result)}\n')
+        return status, result
+
+    return wrapper
+
+
+class AsyncPetFriends:
+    """Асинхронная (asyncio + aiohttp) апи библиотека к веб приложению Pet Friends.
+
+    Повторяет методы PetFriends и возвращает те же кортежи (status, result).
+    Все запросы идут через одну сессию aiohttp с общим пулом соединений:
+    limit - всего соединений, limit_per_host - соединений на хост,
+    max_concurrency - сколько запросов одновременно может быть в работе (семафор).
+    single_flight=True - одинаковые одновременные GET (get_api_key, get_list_of_pets) выполняются
+    одним запросом (singleflight.AsyncSingleFlight, счетчики - pf.single_flight.stats()).
+    Использовать как async with AsyncPetFriends() as pf или закрывать через await pf.close()"""
+
+    base_url = PetFriends.base_url
+
+    def __init__(self, base_url: str = None, limit: int = 100, limit_per_host: int = 100,
+                 max_concurrency: int = 100, keepalive_timeout: float = 15.0, single_flight: bool = False):
+        if base_url is not None:
+            self.base_url = base_url
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._semaphore = None
+        self.single_flight = AsyncSingleFlight() if single_flight else None
+
+    async def _get_session(self):
+        # сессию aiohttp можно создавать только внутри запущенного event loop
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        """Закрывает сессию и все соединения пула"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _request(self, method: str, url: str, **kwargs):
+        """Выполняет запрос под семафором и разбирает ответ так же, как PetFriends:
+        JSON, если тело им является, иначе текст"""
+        if method == 'GET' and self.single_flight is not None:
+            key = (url, tuple(sorted(kwargs.get('headers', {}).items())),
+                   tuple(sorted(kwargs.get('params', {}).items())))
+            response, shared = await self.single_flight.do(key, lambda: self._fetch(method, url, **kwargs))
+            status, raw, content_type, encoding, fields = response
+            if shared:
+                fields = {**fields, 'coalesced': True}
+        else:
+            status, raw, content_type, encoding, fields = await self._fetch(method, url, **kwargs)
+        log_writer.note(**fields)
+        return status, json_codec.decode(raw, content_type, encoding)
+
+    async def _fetch(self, method: str, url: str, **kwargs):
+        # статус, тело в байтах, Content-Type, кодировка и поля для лога; разбор JSON - у каждого вызывающего свой
+        session = await self._get_session()
+        async with self._semaphore:
+            async with session.request(method, url, **kwargs) as res:
+                status = res.status
+                raw = await res.read()
+                content_type = res.headers.get('Content-Type', '')
+                encoding = res.get_encoding()
+        fields = {'method': method, 'url': str(res.url), 'status': status,
+                  'request_bytes': int(res.request_info.headers.get('Content-Length') or 0),
+                  'response_bytes': len(raw)}
+        return status, raw, content_type, encoding, fields
+
+    @staticmethod
+    def _multipart_headers(headers: dict, body: MultipartEncoder) -> dict:
+        return {**headers, 'Content-Type': body.content_type, 'Content-Length': str(len(body))}
+
+    @alog_api
+    async def get_api_key(self, email: str, passwd: str):
+        """Запрашивает у сервера уникальный ключ пользователя по email и паролю"""
+        headers = {
+            'email': email,
+            'password': passwd,
+        }
+        url = self.base_url + 'api/key'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}')
+        return await self._request('GET', url, headers=headers)
+
+    @alog_api
+    async def get_list_of_pets(self, auth_key: dict, filter: str = ""):
+        """Возвращает список питомцев, совпадающих с фильтром ('' - все питомцы, 'my_pets' - свои)"""
+        headers = {'auth_key': auth_key['key']}
+        filter = {'filter': filter}
+        url = self.base_url + 'api/pets'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nParams: {filter}')
+        return await self._request('GET', url, headers=headers, params=filter)
+
+    @alog_api
+    async def add_new_pet(self, auth_key: dict, name: str, animal_type: str, age: str, pet_photo):
+        """Добавляет нового питомца с фото, возвращает статус и данные питомца"""
+        data = {
+            'name': name,
+            'animal_type': animal_type,
+            'age': age,
+        }
+        headers = {'auth_key': auth_key['key']}
+        url = self.base_url + 'api/pets'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nData: {data}')
+        # кодировщик открывает файл и читает его начало - тоже не в цикле событий
+        with await asyncio.to_thread(MultipartEncoder, data, {'pet_photo': pet_photo}) as body:
+            return await self._request('POST', url, headers=self._multipart_headers(headers, body), data=body)
+
+    @alog_api
+    async def delete_pet(self, auth_key: dict, pet_id: str):
+        """Удаляет питомца по ID"""
+        headers = {'auth_key': auth_key['key']}
+        url = self.base_url + f'api/pets/{pet_id}'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}')
+        return await self._request('DELETE', url, headers=headers)
+
+    @alog_api
+    async def update_pet_info(self, auth_key: dict, pet_id: str, name: str, animal_type: str, age: str):
+        """Обновляет информацию о питомце по его ID"""
+        headers = {'auth_key': auth_key['key']}
+        data = {
+            'name': name,
+            'animal_type': animal_type,
+            'age': age
+        }
+        url = self.base_url + f'api/pets/{pet_id}'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nData: {data}')
+        return await self._request('PUT', url, headers=headers, data={k: str(v) for k, v in data.items()})
+
+    @alog_api
+    async def add_new_pet_without_photo(self, auth_key: dict, name: str, animal_type: str, age: str):
+        """Добавляет нового питомца без изображения"""
+        headers = {'auth_key': auth_key['key']}
+        data = {
+            'name': name,
+            'animal_type': animal_type,
+            'age': age
+        }
+        url = self.base_url + 'api/create_pet_simple'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nData: {data}')
+        return await self._request('POST', url, headers=headers, data={k: str(v) for k, v in data.items()})
+
+    @alog_api
+    async def add_pet_photo(self, auth_key: dict, pet_id: str, pet_photo):
+        """Добавляет фото к существующему питомцу"""
+        headers = {'auth_key': auth_key['key']}
+        url = self.base_url + f'api/pets/set_photo/{pet_id}'
+        append_to_file(log_writer.config.filename, f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}')
+        with await asyncio.to_thread(MultipartEncoder, files={'pet_photo': pet_photo}) as body:
+            return await self._request('POST', url, headers=self._multipart_headers(headers, body), data=body)
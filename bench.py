@@ -0,0 +1,263 @@
+"""Нагрузочный прогон клиента PetFriends.
+
+Повторяет смесь операций клиента (получение ключа, список, добавление с фото и без, обновление, удаление)
+с заданной конкурентностью и/или целевым RPS, после прогрева меряет задержки и ошибки по каждой операции
+и пишет результат в JSON, чтобы сравнивать прогоны между собой.
+
+    python -m bench --fake --concurrency 8 --duration 10
+    python -m bench --rps 50 --mix list=5,add=1,delete=1 --output run.json --compare baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from api import PetFriends
+
+DEFAULT_MIX = 'key=1,list=4,add=1,add_simple=1,update=1,delete=1'
+DEFAULT_PHOTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'images', 'cat1.jpg')
+
+
+def parse_mix(mix: str) -> dict:
+    """'list=4,add=1' -> {'list': 4.0, 'add': 1.0}"""
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation {name!r}, expected one of {", ".join(OPERATIONS)}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированному списку"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: list, errors: int, duration: float) -> dict:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'count': count,
+        'errors': errors,
+        'error_rate': errors / count if count else 0.0,
+        'throughput': count / duration if duration else 0.0,
+        'mean_ms': sum(values) / count * 1000 if count else 0.0,
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': values[-1] * 1000 if values else 0.0,
+    }
+
+
+class LoadRunner:
+    """Гоняет смесь операций в concurrency потоках на одном клиенте PetFriends"""
+
+    def __init__(self, pf: PetFriends, email: str, password: str, mix: dict, concurrency: int = 4,
+                 rps: float = 0, photo: str = DEFAULT_PHOTO):
+        self.pf = pf
+        self.email = email
+        self.password = password
+        self.mix = mix
+        self.concurrency = concurrency
+        self.rps = rps
+        self.photo = photo
+        self.auth_key = None
+        self._pets = deque()  # id питомцев, созданных прогоном, для update/delete
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._samples = {name: [] for name in OPERATIONS}
+        self._errors = {name: 0 for name in OPERATIONS}
+
+    def _pace(self) -> None:
+        # общее расписание на все потоки: очередной запрос не раньше чем через 1/rps после предыдущего
+        if not self.rps:
+            return
+        with self._lock:
+            now = time.perf_counter()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + 1 / self.rps
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _take_pet(self):
+        # питомец забирается из очереди целиком, чтобы update и delete в разных потоках не столкнулись
+        with self._lock:
+            if self._pets:
+                return self._pets.popleft()
+        status, result = self.pf.add_new_pet_without_photo(self.auth_key, 'bench', 'cat', '1')
+        return result['id'] if status == 200 else None
+
+    def _remember(self, status, result) -> None:
+        if status == 200 and isinstance(result, dict) and 'id' in result:
+            with self._lock:
+                self._pets.append(result['id'])
+
+    def run_once(self, name: str):
+        """Выполняет одну операцию, возвращает (успех, длительность в секундах)"""
+        pet_id = None
+        if name in ('update', 'delete'):
+            # подготовка питомца не входит в замер операции
+            pet_id = self._take_pet()
+        started = time.perf_counter()
+        try:
+            status, result = OPERATIONS[name](self, pet_id)
+        except Exception:
+            return False, time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        if name in ('add', 'add_simple', 'update'):
+            self._remember(status, result)
+        return status == 200, elapsed
+
+    def _worker(self, names, weights, warmup_end: float, end: float) -> None:
+        rnd = random.Random()
+        while True:
+            self._pace()
+            if time.perf_counter() >= end:
+                return
+            name = rnd.choices(names, weights)[0]
+            ok, elapsed = self.run_once(name)
+            if time.perf_counter() - elapsed >= warmup_end:
+                with self._lock:
+                    self._samples[name].append(elapsed)
+                    if not ok:
+                        self._errors[name] += 1
+
+    def run(self, duration: float, warmup: float = 0) -> dict:
+        status, result = self.pf.get_api_key(self.email, self.password)
+        if status != 200:
+            raise RuntimeError(f'Cannot get api key: {status} {result}')
+        self.auth_key = result
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        existing = set(self.pf.created.ids())
+        started_at = time.time()
+        started = time.perf_counter()
+        warmup_end = started + warmup
+        end = warmup_end + duration
+        threads = [threading.Thread(target=self._worker, args=(names, weights, warmup_end, end), daemon=True)
+                   for _ in range(self.concurrency)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            measured = max(time.perf_counter() - warmup_end, 1e-9)
+            connections = self.pf.connection_stats()
+        finally:
+            # питомцы 'bench', которых прогон создал и не удалил, удаляются; чужие питомцы клиента не трогаются
+            leftovers = [pet_id for pet_id in self.pf.created.ids() if pet_id not in existing]
+            cleanup = self.pf.delete_pets(self.auth_key, leftovers).wait().stats()
+            self._pets.clear()
+
+        endpoints = {name: summarize(self._samples[name], self._errors[name], measured)
+                     for name in names if self._samples[name]}
+        all_samples = [value for name in names for value in self._samples[name]]
+        return {
+            'config': {'base_url': self.pf.base_url, 'mix': self.mix, 'concurrency': self.concurrency,
+                       'rps': self.rps, 'warmup': warmup, 'duration': duration},
+            'started_at': started_at,
+            'measured_seconds': measured,
+            'endpoints': endpoints,
+            'total': summarize(all_samples, sum(self._errors.values()), measured),
+            'connections': connections,
+            'cleanup': cleanup,
+        }
+
+
+OPERATIONS = {
+    'key': lambda runner, _: runner.pf.get_api_key(runner.email, runner.password),
+    'list': lambda runner, _: runner.pf.get_list_of_pets(runner.auth_key, 'my_pets'),
+    'add': lambda runner, _: runner.pf.add_new_pet(runner.auth_key, 'bench', 'cat', '1', runner.photo),
+    'add_simple': lambda runner, _: runner.pf.add_new_pet_without_photo(runner.auth_key, 'bench', 'cat', '1'),
+    'update': lambda runner, pet_id: runner.pf.update_pet_info(runner.auth_key, pet_id, 'bench2', 'cat', '2'),
+    'delete': lambda runner, pet_id: runner.pf.delete_pet(runner.auth_key, pet_id),
+}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Операции, у которых p95 или доля ошибок выросли больше чем на tolerance относительно baseline"""
+    regressions = []
+    for name, stats in current['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(name)
+        if not base:
+            continue
+        if base['p95_ms'] and stats['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p95 {base["p95_ms"]:.1f} -> {stats["p95_ms"]:.1f} ms')
+        if stats['error_rate'] > base['error_rate'] + tolerance / 10:
+            regressions.append(f'{name}: error rate {base["error_rate"]:.2%} -> {stats["error_rate"]:.2%}')
+    return regressions
+
+
+def print_report(report: dict, out=sys.stdout) -> None:
+    header = f'{"operation":<12}{"count":>8}{"err%":>8}{"rps":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+    print(header, file=out)
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for name, stats in rows:
+        print(f'{name:<12}{stats["count"]:>8}{stats["error_rate"] * 100:>8.2f}{stats["throughput"]:>9.1f}'
+              f'{stats["p50_ms"]:>9.1f}{stats["p95_ms"]:>9.1f}{stats["p99_ms"]:>9.1f}', file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Нагрузочный прогон клиента PetFriends')
+    parser.add_argument('--base-url', help='адрес сервера (по умолчанию PetFriends.base_url)')
+    parser.add_argument('--fake', action='store_true', help='поднять локальный фейковый сервер и гонять на нем')
+    parser.add_argument('--email', help='email пользователя (по умолчанию из settings)')
+    parser.add_argument('--password', help='пароль пользователя (по умолчанию из settings)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'веса операций, по умолчанию {DEFAULT_MIX}')
+    parser.add_argument('--concurrency', type=int, default=4, help='число потоков')
+    parser.add_argument('--rps', type=float, default=0, help='целевой RPS на все потоки (0 - без ограничения)')
+    parser.add_argument('--warmup', type=float, default=2, help='прогрев в секундах, не попадает в статистику')
+    parser.add_argument('--duration', type=float, default=10, help='длительность замера в секундах')
+    parser.add_argument('--photo', default=DEFAULT_PHOTO, help='фото для операции add')
+    parser.add_argument('--output', help='куда записать результат в JSON')
+    parser.add_argument('--compare', help='JSON предыдущего прогона для поиска регрессий')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='допустимый рост p95 относительно --compare')
+    args = parser.parse_args(argv)
+
+    email, password = args.email, args.password
+    if email is None or password is None:
+        import settings
+        email = email or settings.valid_email
+        password = password or settings.valid_password
+
+    server = None
+    base_url = args.base_url
+    if args.fake:
+        from fake_server import FakePetFriendsServer
+        server = FakePetFriendsServer({email: password}).start()
+        base_url = server.url
+    try:
+        with PetFriends(base_url=base_url, pool_maxsize=max(args.concurrency, 10)) as pf:
+            runner = LoadRunner(pf, email, password, parse_mix(args.mix), args.concurrency, args.rps, args.photo)
+            report = runner.run(args.duration, args.warmup)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print('REGRESSION', line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
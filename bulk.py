@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class BatchItem:
+    """Результат одного элемента пачки: index - номер во входных данных, item - сам элемент,
+    status/result - ответ метода клиента, error - исключение, если вызов упал"""
+    __slots__ = ('index', 'item', 'status', 'result', 'error', 'elapsed')
+
+    def __init__(self, index, item, status=None, result=None, error=None, elapsed=0.0):
+        self.index = index
+        self.item = item
+        self.status = status
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status == 200
+
+    def __repr__(self):
+        return f'BatchItem(index={self.index}, status={self.status}, error={self.error!r})'
+
+
+class BatchResult:
+    """Пачка вызовов, которая выполняется в пуле потоков.
+
+    Итерация запускает выполнение и отдает BatchItem по мере готовности (не во входном порядке).
+    В работе одновременно не больше max_workers * 2 элементов, поэтому входной итератор
+    может быть сколь угодно длинным. Ошибка одного элемента не останавливает остальные.
+    После итерации (или wait()) доступны items и stats()"""
+
+    def __init__(self, func, items, max_workers: int = 8):
+        self._func = func
+        self._items = items
+        self.max_workers = max_workers
+        self.items = []
+        self.started = None
+        self.finished = None
+
+    def _call(self, index, item) -> BatchItem:
+        started = time.perf_counter()
+        try:
+            status, result = self._func(item)
+            return BatchItem(index, item, status, result, elapsed=time.perf_counter() - started)
+        except Exception as e:
+            return BatchItem(index, item, error=e, elapsed=time.perf_counter() - started)
+
+    def __iter__(self):
+        if self.started is not None:
+            yield from self.items
+            return
+        self.started = time.perf_counter()
+        source = enumerate(self._items)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='petfriends-batch') as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.max_workers * 2:
+                    try:
+                        index, item = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(self._call, index, item))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_item = future.result()
+                    self.items.append(batch_item)
+                    yield batch_item
+        self.finished = time.perf_counter()
+
+    def wait(self) -> 'BatchResult':
+        """Выполняет всю пачку и возвращает себя"""
+        for _ in self:
+            pass
+        return self
+
+    def stats(self) -> dict:
+        """Итоги пачки: сколько выполнено, успешно и с ошибкой, длительность, пропускная способность"""
+        elapsed = ((self.finished or time.perf_counter()) - self.started) if self.started else 0.0
+        succeeded = sum(1 for item in self.items if item.ok)
+        latencies = [item.elapsed for item in self.items]
+        return {
+            'total': len(self.items),
+            'succeeded': succeeded,
+            'failed': len(self.items) - succeeded,
+            'elapsed': elapsed,
+            'throughput': len(self.items) / elapsed if elapsed else 0.0,
+            'avg_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+        }
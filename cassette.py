@@ -0,0 +1,195 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests import Response
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from file_lock import atomic_write
+
+# Запись и воспроизведение трафика PetFriends (кассета). Подключается на уровне адаптера сессии:
+# PetFriends(cassette=Cassette('petfriends.json', 'record')) - все запросы клиента записываются,
+# Cassette(..., 'replay') - ответы берутся из кассеты без сети.
+#
+# Запрос ищется по ключу: метод, путь и отсортированные параметры (без хоста - запись с настоящего
+# сервера воспроизводится при любом base_url), заголовки авторизации и хэш тела. Граница multipart
+# в теле заменяется постоянной, поэтому одна и та же загрузка фото дает один и тот же ключ.
+# Тела запросов и ответов хранятся отдельно по хэшу содержимого - одинаковое фото в кассете одно.
+# Одинаковые запросы с разными ответами (список до и после добавления питомца) воспроизводятся по порядку.
+# При воспроизведении от тела запроса считается только хэш, в памяти тела остаются лишь у записанных ответов.
+# В кассете ключи api/key и ответы с личными данными, поэтому файл доступен только владельцу (0o600).
+
+RECORD = 'record'
+REPLAY = 'replay'
+AUTO = 'auto'
+
+# заголовки запроса, от которых зависит ответ; значения в кассету не попадают - только их хэш в ключе
+MATCH_HEADERS = ('auth_key', 'email', 'password', 'If-None-Match', 'If-Modified-Since')
+# заголовки ответа, которые не имеет смысла воспроизводить
+_SKIP_RESPONSE_HEADERS = frozenset(('date', 'connection', 'keep-alive', 'set-cookie', 'transfer-encoding'))
+
+
+class CassetteMiss(RequestException):
+    """В режиме replay запроса нет в кассете"""
+
+
+class Cassette:
+    """Кассета с записанными запросами и ответами.
+
+    mode: 'record' - запросы идут в сеть, кассета пишется заново; 'replay' - только из кассеты,
+    незаписанный запрос - CassetteMiss; 'auto' - из кассеты, а незаписанные запросы идут в сеть
+    и дописываются. Файл с расширением .gz сжимается. Записанное сохраняется в save()
+    или при выходе из with Cassette(...) as cassette"""
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        if mode not in (RECORD, REPLAY, AUTO):
+            raise ValueError(f'Unknown cassette mode: {mode}')
+        self.path = path
+        self.mode = mode
+        self._interactions = {}  # ключ -> [ответ, ...] в порядке записи
+        self._bodies = {}  # sha256 -> bytes
+        self._positions = {}  # ключ -> номер следующего ответа при воспроизведении
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.recorded = 0
+        self.played = 0
+        self.misses = 0
+        if mode != RECORD and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._interactions.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def request_key(self, request) -> str:
+        """Ключ запроса. Тело-поток (MultipartEncoder) читается в память и подставляется в запрос"""
+        body = _request_body(request)
+        parts = urlsplit(request.url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        headers = '\n'.join(f'{name}: {request.headers[name]}' for name in MATCH_HEADERS if name in request.headers)
+        body_hash = hashlib.sha256(body).hexdigest() if body else ''
+        signature = f'{request.method}\n{parts.path}?{query}\n{headers}\n{body_hash}'
+        return hashlib.sha256(signature.encode('utf-8')).hexdigest()
+
+    def play(self, key: str, request):
+        """Записанный ответ на запрос или None (в режиме replay вместо None - CassetteMiss)"""
+        if self.mode == RECORD:
+            return None
+        with self._lock:
+            responses = self._interactions.get(key)
+            if not responses:
+                self.misses += 1
+                if self.mode == REPLAY:
+                    raise CassetteMiss(f'No recorded response for {request.method} {request.url}', request=request)
+                return None
+            # записей меньше, чем повторов запроса, - повторяется последний ответ
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            recorded = responses[min(position, len(responses) - 1)]
+            content = self._bodies[recorded['body']] if recorded['body'] else b''
+            self.played += 1
+        return _build_response(request, recorded, content)
+
+    def record(self, key: str, response) -> None:
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in _SKIP_RESPONSE_HEADERS}
+        content = response.content
+        body_hash = self._put_body(content) if content else ''
+        # тело запроса сохраняется только здесь, при записи: request_key уже подставил его байтами
+        request_body = _request_body(response.request)
+        request_hash = self._put_body(request_body) if request_body else ''
+        with self._lock:
+            self._interactions.setdefault(key, []).append(
+                {'method': response.request.method, 'path': urlsplit(response.request.url).path,
+                 'request_body': request_hash, 'status': response.status_code,
+                 'reason': response.reason, 'headers': headers, 'body': body_hash})
+            self._dirty = True
+            self.recorded += 1
+
+    def save(self) -> None:
+        """Записывает кассету в файл (атомарно), если в ней появились новые ответы"""
+        with self._lock:
+            if not self._dirty:
+                return
+            used = self._used_bodies()
+            data = {'version': 1, 'interactions': self._interactions,
+                    'bodies': {digest: base64.b64encode(body).decode('ascii')
+                               for digest, body in self._bodies.items() if digest in used}}
+            self._dirty = False
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        atomic_write(self.path, gzip.compress(raw) if self.path.endswith('.gz') else raw)
+
+    def stats(self) -> dict:
+        return {'recorded': self.recorded, 'played': self.played, 'misses': self.misses,
+                'interactions': len(self), 'bodies': len(self._bodies)}
+
+    def _put_body(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self._bodies.setdefault(digest, bytes(body))
+        return digest
+
+    def _used_bodies(self) -> set:
+        # в файл попадают только тела, на которые ссылаются записи (после record кассета пишется заново)
+        used = set()
+        for responses in self._interactions.values():
+            for recorded in responses:
+                used.update((recorded['request_body'], recorded['body']))
+        return used
+
+    def _load(self) -> None:
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        if self.path.endswith('.gz'):
+            raw = gzip.decompress(raw)
+        data = json.loads(raw)
+        self._interactions = data['interactions']
+        self._bodies = {digest: base64.b64decode(body) for digest, body in data['bodies'].items()}
+
+
+def _request_body(request) -> bytes:
+    """Тело запроса в байтах с постоянной границей multipart. Тело-поток читается один раз
+    и подставляется в запрос байтами, чтобы его можно было отправить"""
+    body = request.body
+    if hasattr(body, 'read'):
+        body = body.to_bytes() if hasattr(body, 'to_bytes') else body.read()
+        request.body = body
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    body = body or b''
+    boundary = _boundary(request.headers.get('Content-Type', ''))
+    if boundary:
+        body = body.replace(boundary.encode('latin-1'), b'BOUNDARY')
+    return body
+
+
+def _boundary(content_type: str):
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'boundary':
+            return value.strip('"')
+    return None
+
+
+def _build_response(request, recorded: dict, content: bytes) -> Response:
+    response = Response()
+    response.status_code = recorded['status']
+    response.reason = recorded['reason']
+    response.headers = CaseInsensitiveDict(recorded['headers'])
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = content
+    response._content_consumed = True
+    response.url = request.url
+    response.request = request
+    return response
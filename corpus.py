@@ -0,0 +1,88 @@
+import itertools
+import json
+import os
+
+from bulk import BatchResult
+
+# Корпус граничных данных для добавления питомцев: компактный JSONL, одна строка - один случай
+# или целое семейство случаев. Значение поля может быть:
+#   строкой / числом / null      - как есть,
+#   списком значений             - по случаю на каждое (списки разных полей перемножаются),
+#   {"repeat": "Б", "times": [0, 1, 255, 4096]} - строка из повторов, по случаю на каждую длину.
+# Поля: id (префикс имени случая), name, animal_type, age, photo (путь относительно файла корпуса
+# или null - без фото), expect (ожидаемый статус, по умолчанию 200), xfail (причина известного бага).
+# Случаи разворачиваются лениво, по мере чтения файла, поэтому корпус может давать тысячи случаев.
+
+FIELDS = ('name', 'animal_type', 'age', 'photo')
+
+
+class PetCase:
+    """Один случай корпуса"""
+    __slots__ = ('id', 'name', 'animal_type', 'age', 'photo', 'expect', 'xfail')
+
+    def __init__(self, id: str, name, animal_type, age, photo=None, expect: int = 200, xfail: str = None):
+        self.id = id
+        self.name = name
+        self.animal_type = animal_type
+        self.age = age
+        self.photo = photo
+        self.expect = expect
+        self.xfail = xfail
+
+    def __repr__(self):
+        return f'PetCase({self.id!r}, expect={self.expect})'
+
+
+def _values(spec) -> list:
+    if isinstance(spec, list):
+        return spec
+    if isinstance(spec, dict):
+        return [spec['repeat'] * times for times in spec['times']]
+    return [spec]
+
+
+def _label(value) -> str:
+    # короткая подпись значения для id случая: длинные строки - по длине
+    if value is None:
+        return 'none'
+    text = str(value)
+    return text if 0 < len(text) <= 12 and text.isprintable() and text.strip() else f'len{len(text)}'
+
+
+def expand(entry: dict, base_dir: str = ''):
+    """Разворачивает одну строку корпуса в случаи (произведение значений всех полей)"""
+    options = [_values(entry.get(field)) for field in FIELDS]
+    varying = [len(values) > 1 for values in options]
+    for combination in itertools.product(*options):
+        name, animal_type, age, photo = combination
+        labels = [_label(os.path.basename(value) if field == 'photo' and value else value)
+                  for field, value, varies in zip(FIELDS, combination, varying) if varies]
+        case_id = '-'.join([entry['id']] + labels)
+        if photo is not None:
+            photo = os.path.join(base_dir, photo)
+        yield PetCase(case_id, name, animal_type, age, photo, entry.get('expect', 200), entry.get('xfail'))
+
+
+def iter_cases(path: str, limit: int = None):
+    """Лениво читает корпус path и отдает случаи по одному, не больше limit"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def cases():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield from expand(json.loads(line), base_dir)
+
+    return itertools.islice(cases(), limit)
+
+
+def run_cases(pf, auth_key: dict, cases, max_workers: int = 16) -> BatchResult:
+    """Добавляет питомцев из случаев параллельно через клиент pf (add_new_pet или, без фото,
+    add_new_pet_without_photo). Возвращает bulk.BatchResult, у его элементов item - PetCase"""
+    def add(case: PetCase):
+        if case.photo is not None:
+            return pf.add_new_pet(auth_key, case.name, case.animal_type, case.age, case.photo)
+        return pf.add_new_pet_without_photo(auth_key, case.name, case.animal_type, case.age)
+
+    return BatchResult(add, cases, max_workers)
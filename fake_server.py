@@ -0,0 +1,261 @@
+import base64
+import hashlib
+import json
+import secrets
+import threading
+import time
+import uuid
+from collections import deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from multipart import detect_mime
+
+# Локальная замена сервера PetFriends для быстрых тестов без сети.
+# Реализует те же эндпоинты, коды ответов и формат данных, что и https://petfriends.skillfactory.ru/api
+# (включая известные баги - например, питомец с пустыми полями создается со статусом 200).
+# Список питомцев отдается с ETag и поддерживает If-None-Match (304) для проверки кэша ответов.
+
+FORBIDDEN = ('<!doctype html><title>403 Forbidden</title><h1>Forbidden</h1>'
+             '<p>Please provide &#x27;auth_key&#x27; Header</p>')
+
+
+class FakePetFriendsState:
+    """Данные фейкового сервера: пользователи, их ключи и питомцы"""
+
+    def __init__(self, users: dict, seed_pets: int = 1):
+        self.users = dict(users)
+        self.keys = {email: secrets.token_hex(28) for email in self.users}
+        self.user_ids = {email: uuid.uuid4().hex[:16] for email in self.users}
+        self.pets = {}  # id -> питомец, в порядке создания
+        self.faults = deque()  # (статус, заголовки) для ближайших запросов, см. fail_next
+        self.lock = threading.Lock()
+        for email in self.users:
+            for n in range(seed_pets):
+                self.create_pet(self.user_ids[email], f'Seed {n}', 'cat', str(n + 1), '')
+
+    def user_by_key(self, key: str):
+        for email, user_key in self.keys.items():
+            if user_key == key:
+                return self.user_ids[email]
+        return None
+
+    def fail_next(self, status: int, count: int = 1, headers: dict = None) -> None:
+        """Следующие count запросов (любых) получат ответ status с заголовками headers - для проверки повторов"""
+        with self.lock:
+            self.faults.extend([(status, dict(headers or {}))] * count)
+
+    def create_pet(self, user_id: str, name: str, animal_type: str, age: str, pet_photo: str) -> dict:
+        pet = {'id': str(uuid.uuid4()), 'name': name, 'animal_type': animal_type, 'age': age,
+               'pet_photo': pet_photo, 'created_at': f'{time.time():.6f}', 'user_id': user_id}
+        with self.lock:
+            self.pets[pet['id']] = pet
+        return pet
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakePetFriends/1.0'
+
+    @property
+    def state(self) -> FakePetFriendsState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body, content_type: str = 'application/json', headers: dict = None) -> None:
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False)
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        extra = ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+        head = (f'HTTP/1.1 {status} {self.responses.get(status, ("",))[0]}\r\n'
+                f'Server: {self.server_version}\r\nContent-Type: {content_type}\r\n{extra}'
+                f'Content-Length: {len(data)}\r\n'
+                + ('Connection: close\r\n' if self.close_connection else '') + '\r\n')
+        # заголовки и тело одной записью - иначе на keep-alive соединении ловим задержку ACK
+        self.wfile.write(head.encode('latin-1') + data)
+
+    def _forbidden(self) -> None:
+        self._send(403, FORBIDDEN, 'text/html; charset=utf-8')
+
+    def _fault(self) -> bool:
+        """Отвечает заранее заданной ошибкой (FakePetFriendsState.fail_next), если она есть"""
+        with self.state.lock:
+            if not self.state.faults:
+                return False
+            status, headers = self.state.faults.popleft()
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)  # тело дочитываем, чтобы соединение осталось пригодным для keep-alive
+        self._send(status, self.responses.get(status, ('Error',))[0], 'text/html; charset=utf-8', headers)
+        return True
+
+    def _user(self):
+        return self.state.user_by_key(self.headers.get('auth_key', ''))
+
+    def _form(self):
+        """Поля формы и файлы из тела запроса (multipart/form-data или x-www-form-urlencoded)"""
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type', '')
+        fields, files = {}, {}
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser(policy=HTTP).parsebytes(
+                b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + raw)
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                payload = part.get_payload(decode=True) or b''
+                if part.get_filename() is not None:
+                    files[name] = payload
+                else:
+                    fields[name] = payload.decode('utf-8')
+        elif raw:
+            query = parse_qs(raw.decode('utf-8'), keep_blank_values=True)
+            fields = {name: values[0] for name, values in query.items()}
+        return fields, files
+
+    @staticmethod
+    def _photo(data: bytes) -> str:
+        mime = detect_mime(data[:16])
+        if mime == 'application/octet-stream':
+            mime = 'image/jpeg'
+        return f'data:{mime};base64,' + base64.b64encode(data).decode('ascii')
+
+    def _route(self):
+        path = urlsplit(self.path).path
+        parts = [part for part in path.split('/') if part]
+        return path, parts
+
+    def do_GET(self):
+        if self._fault():
+            return
+        path, parts = self._route()
+        if path == '/api/key':
+            email = self.headers.get('email', '')
+            if email in self.state.users and self.state.users[email] == self.headers.get('password'):
+                return self._send(200, {'key': self.state.keys[email]})
+            return self._send(403, "This user wasn't found in database", 'text/html; charset=utf-8')
+        if path == '/api/pets':
+            user = self._user()
+            if user is None:
+                return self._forbidden()
+            pet_filter = parse_qs(urlsplit(self.path).query, keep_blank_values=True).get('filter', [''])[0]
+            with self.state.lock:
+                pets = [dict(pet) for pet in reversed(self.state.pets.values())]
+            if pet_filter == 'my_pets':
+                pets = [pet for pet in pets if pet['user_id'] == user]
+            elif pet_filter:
+                return self._send(500, 'Filter value is incorrect', 'text/html; charset=utf-8')
+            body = json.dumps({'pets': pets}, ensure_ascii=False).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, b'', headers={'ETag': etag})
+            return self._send(200, body, headers={'ETag': etag})
+        self._send(404, 'Not Found', 'text/html; charset=utf-8')
+
+    def do_POST(self):
+        if self._fault():
+            return
+        path, parts = self._route()
+        fields, files = self._form()
+        user = self._user()
+        if path == '/api/pets' or path == '/api/create_pet_simple':
+            if user is None:
+                return self._forbidden()
+            if any(field not in fields for field in ('name', 'animal_type', 'age')):
+                return self._send(400, 'Bad Request', 'text/html; charset=utf-8')
+            photo = ''
+            if path == '/api/pets':
+                if 'pet_photo' not in files:
+                    return self._send(400, 'Bad Request', 'text/html; charset=utf-8')
+                photo = self._photo(files['pet_photo'])
+            pet = self.state.create_pet(user, fields['name'], fields['animal_type'], fields['age'], photo)
+            return self._send(200, pet)
+        if len(parts) == 4 and parts[:3] == ['api', 'pets', 'set_photo']:
+            if user is None:
+                return self._forbidden()
+            with self.state.lock:
+                pet = self.state.pets.get(parts[3])
+                if pet is None or pet['user_id'] != user or 'pet_photo' not in files:
+                    return self._send(400, 'Bad Request', 'text/html; charset=utf-8')
+                pet['pet_photo'] = self._photo(files['pet_photo'])
+                pet = dict(pet)
+            return self._send(200, pet)
+        self._send(404, 'Not Found', 'text/html; charset=utf-8')
+
+    def do_PUT(self):
+        if self._fault():
+            return
+        path, parts = self._route()
+        fields, _ = self._form()
+        if len(parts) != 3 or parts[:2] != ['api', 'pets']:
+            return self._send(404, 'Not Found', 'text/html; charset=utf-8')
+        user = self._user()
+        if user is None:
+            return self._forbidden()
+        with self.state.lock:
+            pet = self.state.pets.get(parts[2])
+            if pet is None or pet['user_id'] != user:
+                return self._send(400, "Pet with this id wasn't found!", 'text/html; charset=utf-8')
+            for field in ('name', 'animal_type', 'age'):
+                if field in fields:
+                    pet[field] = fields[field]
+            pet = dict(pet)
+        self._send(200, pet)
+
+    def do_DELETE(self):
+        if self._fault():
+            return
+        path, parts = self._route()
+        if len(parts) != 3 or parts[:2] != ['api', 'pets']:
+            return self._send(404, 'Not Found', 'text/html; charset=utf-8')
+        user = self._user()
+        if user is None:
+            return self._forbidden()
+        with self.state.lock:
+            pet = self.state.pets.get(parts[2])
+            if pet is not None:
+                if pet['user_id'] != user:
+                    return self._forbidden()
+                del self.state.pets[parts[2]]
+        self._send(200, '', 'text/html; charset=utf-8')
+
+
+class FakePetFriendsServer:
+    """Фейковый сервер PetFriends на свободном локальном порту.
+
+    users - {email: пароль} допустимых пользователей, seed_pets - сколько питомцев заранее создать
+    каждому пользователю. Адрес для PetFriends.base_url - свойство url.
+    Использовать как with FakePetFriendsServer(...) as server или через start()/stop()"""
+
+    def __init__(self, users: dict, seed_pets: int = 1, host: str = '127.0.0.1', port: int = 0):
+        self.state = FakePetFriendsState(users, seed_pets)
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.state = self.state
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self) -> 'FakePetFriendsServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-petfriends', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,48 @@
+import contextlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def locked(path: str, shared: bool = False):
+    """Межпроцессная блокировка на файле path (создается при необходимости).
+    shared=True - разделяемая блокировка для чтения (только там, где есть fcntl)"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data, mode: int = 0o600) -> None:
+    """Атомарно записывает data (str - в utf-8, или bytes) в path: через временный файл рядом и os.replace,
+    поэтому читатели видят либо старое содержимое, либо новое целиком. mode - права нового файла"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,69 @@
+"""Время импорта модулей клиента PetFriends.
+
+Запускает python -X importtime -c "import <модуль>" в отдельном процессе несколько раз и берет лучшее
+суммарное время импорта модуля, заодно проверяет, какие тяжелые зависимости он подтянул.
+С --budget-ms завершается с кодом 1, если время больше бюджета. Тесты всегда проверяют отложенные модули
+и импорт api с запасом в SLACK раз на загрузку машины, точный бюджет - с PETFRIENDS_IMPORT_BUDGET=1.
+
+    python -m import_time api settings --runs 5 --budget-ms 50
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# импорт api должен укладываться в этот бюджет (до ленивой загрузки requests было ~200 мс)
+IMPORT_BUDGET_MS = 50.0
+# во сколько раз тесты по умолчанию разрешают превысить бюджет: на нагруженной машине (CI, xdist) импорт
+# медленнее, но вернувшийся при импорте requests (~200 мс) все равно не пройдет
+SLACK = 3
+# модули, которые должны загружаться только при первом запросе или первом обращении к настройкам
+DEFERRED = ('requests', 'urllib3', 'dotenv', 'asyncio', 'concurrent.futures', 'orjson', 'ujson', 'json', 'gzip')
+
+
+def _run(module: str) -> tuple:
+    # (суммарное время импорта модуля в мкс, список загруженных им модулей из DEFERRED)
+    code = f'import sys; import {module}; print(",".join(m for m in {DEFERRED!r} if m in sys.modules))'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+    total = None
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module and not parts[2][1:].startswith(' '):
+            total = int(parts[1])
+    if total is None:
+        raise RuntimeError(f'module {module!r} not found in -X importtime output')
+    loaded = [name for name in proc.stdout.strip().split(',') if name]
+    return total, loaded
+
+
+def measure(module: str = 'api', runs: int = 5) -> dict:
+    """Лучшее из runs время импорта module (мс) и загруженные при этом модули из DEFERRED"""
+    best, loaded = None, []
+    for _ in range(runs):
+        total, loaded = _run(module)
+        best = total if best is None else min(best, total)
+    return {'module': module, 'import_ms': best / 1000, 'deferred_loaded': loaded}
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Время импорта модулей клиента PetFriends')
+    parser.add_argument('modules', nargs='*', default=['api'])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, help='бюджет времени импорта, по умолчанию не проверяется')
+    args = parser.parse_args(argv)
+    over = False
+    for module in args.modules:
+        result = measure(module, args.runs)
+        print(f"{module:12} {result['import_ms']:8.2f} ms  deferred loaded: {', '.join(result['deferred_loaded']) or '-'}")
+        if args.budget_ms is not None and result['import_ms'] > args.budget_ms:
+            print(f'  over budget ({args.budget_ms} ms)')
+            over = True
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import bisect
+import contextvars
+import socket
+import threading
+import time
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+# Замеры вызовов методов PetFriends: время DNS, TCP соединения, TLS, до первого байта ответа и всего вызова,
+# размеры запроса и ответа, число повторов. Замеры собираются, только если у клиента есть хуки -
+# без хуков вызов идет по прежнему пути, а проверка в соединениях сводится к чтению contextvar.
+
+_current_call = contextvars.ContextVar('petfriends_call_metrics', default=None)
+
+
+def current_call():
+    """CallMetrics текущего вызова или None, если замер не ведется"""
+    return _current_call.get()
+
+
+class CallMetrics:
+    """Замеры одного вызова метода клиента. Времена - в секундах, 0 - этапа не было
+    (например, dns/connect/tls равны 0, если запрос ушел по уже открытому соединению)"""
+    __slots__ = ('method', 'args', 'kwargs', 'http_method', 'url', 'status', 'result', 'error',
+                 'dns', 'connect', 'tls', 'ttfb', 'total', 'request_bytes', 'response_bytes', 'retries',
+                 'started')
+
+    def __init__(self, method: str, args=(), kwargs=None):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.http_method = None
+        self.url = None
+        self.status = None
+        self.result = None
+        self.error = None
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.total = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.started = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ('args', 'kwargs', 'result')}
+
+
+class Instrumentation:
+    """Набор pre/post хуков клиента. pre(call) вызывается до запроса, post(call) - после,
+    когда в call заполнены статус, результат и замеры. Ошибки хуков не ломают вызов клиента"""
+
+    def __init__(self):
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self._hooks)
+
+    def add(self, pre=None, post=None):
+        """Регистрирует хуки, возвращает значение для remove()"""
+        handle = (pre, post)
+        with self._lock:
+            self._hooks = self._hooks + [handle]
+        return handle
+
+    def remove(self, handle) -> None:
+        with self._lock:
+            self._hooks = [hook for hook in self._hooks if hook is not handle]
+
+    def run(self, name: str, func, args, kwargs):
+        """Выполняет func с замером и хуками. func возвращает (status, result)"""
+        call = CallMetrics(name, args, kwargs)
+        hooks = self._hooks
+        for pre, _ in hooks:
+            if pre is not None:
+                _safe(pre, call)
+        token = _current_call.set(call)
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        else:
+            if isinstance(response, tuple):
+                call.status, call.result = response
+            return response
+        finally:
+            _current_call.reset(token)
+            call.total = time.perf_counter() - call.started
+            for _, post in hooks:
+                if post is not None:
+                    _safe(post, call)
+
+
+def _safe(hook, call) -> None:
+    try:
+        hook(call)
+    except Exception:
+        pass
+
+
+def note_response(response, *args, **kwargs):
+    """Хук ответа для requests.Session: метод, url, статус, время до заголовков ответа и размеры"""
+    call = _current_call.get()
+    if call is None:
+        return response
+    request = response.request
+    call.http_method = request.method
+    call.url = request.url
+    call.status = response.status_code
+    call.ttfb += response.elapsed.total_seconds()
+    call.request_bytes += int(request.headers.get('Content-Length') or 0)
+    if kwargs.get('stream'):
+        call.response_bytes += int(response.headers.get('Content-Length') or 0)
+    else:
+        call.response_bytes += len(response.content)
+    return response
+
+
+class _TimedConnectionMixin:
+    """Соединение urllib3, которое записывает время DNS и TCP соединения в текущий CallMetrics"""
+
+    def _new_conn(self):
+        call = _current_call.get()
+        if call is None:
+            return super()._new_conn()
+        started = time.perf_counter()
+        host = self._dns_host
+        try:
+            addresses = list(dict.fromkeys(
+                info[4][0] for info in socket.getaddrinfo(host.strip('[]'), self.port, allowed_gai_family(),
+                                                          socket.SOCK_STREAM)))
+        except (OSError, UnicodeError):
+            addresses = []  # ошибку разрешения имени покажет обычный путь urllib3
+        resolved = time.perf_counter()
+        call.dns += resolved - started
+        try:
+            if not addresses:
+                return super()._new_conn()
+            # адреса перебираются по порядку, как в urllib3: если первый (например, IPv6) недоступен,
+            # соединение уходит на следующий
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError:
+                    if address == addresses[-1]:
+                        raise
+        finally:
+            self._dns_host = host
+            call.connect += time.perf_counter() - resolved
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        call = _current_call.get()
+        if call is None:
+            return super().connect()
+        started = time.perf_counter()
+        before = call.dns + call.connect
+        try:
+            return super().connect()
+        finally:
+            # все, что заняло соединение сверх DNS и TCP, - TLS рукопожатие
+            call.tls += max(time.perf_counter() - started - (call.dns + call.connect - before), 0.0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class LatencyHistograms:
+    """Встроенный post хук: гистограммы замеров по методам клиента в памяти.
+
+    Корзины логарифмические (границы растут вдвое, от 0.1 мс), поэтому память постоянна
+    при любом числе вызовов, а перцентили считаются с точностью до корзины.
+    Подключение: hist = LatencyHistograms(); pf.add_hook(post=hist)"""
+
+    FIELDS = ('dns', 'connect', 'tls', 'ttfb', 'total')
+    BOUNDS = tuple(0.0001 * 2 ** i for i in range(24))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}  # метод -> {'count', 'errors', 'request_bytes', 'response_bytes', 'retries', поле -> корзины}
+
+    def __call__(self, call: CallMetrics) -> None:
+        with self._lock:
+            data = self._data.get(call.method)
+            if data is None:
+                data = self._data[call.method] = {'count': 0, 'errors': 0, 'request_bytes': 0,
+                                                  'response_bytes': 0, 'retries': 0}
+                for field in self.FIELDS:
+                    data[field] = [0] * (len(self.BOUNDS) + 1)
+            data['count'] += 1
+            if call.error is not None or (call.status is not None and call.status >= 400):
+                data['errors'] += 1
+            data['request_bytes'] += call.request_bytes
+            data['response_bytes'] += call.response_bytes
+            data['retries'] += call.retries
+            for field in self.FIELDS:
+                data[field][bisect.bisect_left(self.BOUNDS, getattr(call, field))] += 1
+
+    def percentile(self, method: str, field: str, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает q-й перцентиль (секунды)"""
+        with self._lock:
+            buckets = list(self._data[method][field])
+        total = sum(buckets)
+        if not total:
+            return 0.0
+        threshold = q / 100 * total
+        seen = 0
+        for index, count in enumerate(buckets):
+            seen += count
+            if seen >= threshold:
+                return self.BOUNDS[min(index, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+    def summary(self) -> dict:
+        """{метод: {count, errors, байты, повторы, '<поле>_p50/p95/p99' в мс}}"""
+        result = {}
+        for method in list(self._data):
+            data = self._data[method]
+            row = {key: data[key] for key in ('count', 'errors', 'request_bytes', 'response_bytes', 'retries')}
+            for field in self.FIELDS:
+                for q in (50, 95, 99):
+                    row[f'{field}_p{q}_ms'] = self.percentile(method, field, q) * 1000
+            result[method] = row
+        return result
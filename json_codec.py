@@ -0,0 +1,118 @@
+import importlib
+import time
+
+# Разбор JSON ответов PetFriends. Используется самый быстрый из установленных парсеров
+# (orjson, затем ujson, затем стандартный json), тело разбирается прямо из байтов ответа,
+# без промежуточной строки. JSON разбирается, только если Content-Type говорит о JSON
+# (или его нет, а тело похоже на JSON) - HTML страницы ошибок сразу отдаются текстом.
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+
+def _load_backend(name: str):
+    """Функция loads(bytes) для парсера name или None, если он не установлен"""
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    return module.loads
+
+
+def available_backends() -> list:
+    return [name for name in BACKENDS if _load_backend(name) is not None]
+
+
+def set_backend(name: str = None) -> str:
+    """Выбирает парсер: name из BACKENDS или None - самый быстрый из установленных. Возвращает имя"""
+    global backend, loads
+    for candidate in ([name] if name else BACKENDS):
+        func = _load_backend(candidate)
+        if func is not None:
+            backend, loads = candidate, func
+            return candidate
+    raise ValueError(f'JSON backend {name!r} is not installed')
+
+
+def _first_loads(body):
+    # парсер выбирается при первом разборе, а не при импорте модуля - импорт orjson/ujson не бесплатный
+    set_backend()
+    return loads(body)
+
+
+backend = None
+loads = _first_loads
+
+
+def is_json(content_type: str, body: bytes) -> bool:
+    """Стоит ли пытаться разбирать тело как JSON"""
+    if content_type:
+        return 'json' in content_type.lower()
+    head = body[:64].lstrip()
+    return head[:1] in (b'{', b'[')
+
+
+def decode(body: bytes, content_type: str = '', encoding: str = None):
+    """Разобранный JSON или, если тело не JSON, текст (как раньше делали методы клиента)"""
+    if is_json(content_type, body):
+        try:
+            return loads(body)
+        except ValueError:  # JSONDecodeError всех парсеров наследуется от ValueError
+            pass
+    return body.decode(encoding or 'utf-8', 'replace')
+
+
+def decode_response(res):
+    """decode() для requests.Response"""
+    content_type = res.headers.get('Content-Type', '')
+    if is_json(content_type, res.content):
+        try:
+            return loads(res.content)
+        except ValueError:
+            pass
+    return res.text
+
+
+def sample_pets_body(count: int = 1000) -> bytes:
+    """Тело ответа api/pets с count питомцами в формате сервера (кириллица, фото в base64 у каждого десятого)"""
+    import json
+    import uuid
+
+    photo = 'data:image/jpeg;base64,' + 'A' * 4096
+    pets = [{'id': str(uuid.UUID(int=n)), 'name': f'Барсик {n}', 'animal_type': 'кот', 'age': str(n % 20),
+             'pet_photo': photo if n % 10 == 0 else '', 'created_at': f'{1700000000 + n:.6f}',
+             'user_id': 'a1b2c3d4e5f60718'} for n in range(count)]
+    return json.dumps({'pets': pets}, ensure_ascii=False).encode('utf-8')
+
+
+def benchmark(body: bytes, repeat: int = 50) -> dict:
+    """Лучшее время разбора body (мс) каждым установленным парсером и старым путем res.text + json.loads"""
+    decoders = {name: _load_backend(name) for name in available_backends()}
+    json_loads = _load_backend('json')
+    decoders['text+json'] = lambda raw: json_loads(raw.decode('utf-8'))
+    results = {}
+    for name, func in decoders.items():
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(body)
+            best = min(best, time.perf_counter() - started)
+        results[name] = best * 1000
+    return results
+
+
+def main(argv=None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Сравнение JSON парсеров на ответах api/pets')
+    parser.add_argument('--pets', type=int, nargs='+', default=[10, 1000, 10000], help='число питомцев в ответе')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+    for count in args.pets:
+        body = sample_pets_body(count)
+        print(f'{count} pets, {len(body)} bytes')
+        for name, ms in sorted(benchmark(body, args.repeat).items(), key=lambda item: item[1]):
+            print(f'  {name:10} {ms:9.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
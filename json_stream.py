@@ -0,0 +1,154 @@
+import codecs
+import re
+
+# Инкрементальный разбор массива объектов внутри JSON ответа, например {"pets": [{...}, {...}]}.
+# Тело читается кусками, в памяти держится только текущий кусок и разбираемый элемент.
+
+# Элемент, целиком лежащий в буфере, разбирается json сразу. Если элемент обрезан концом куска,
+# следующие куски не приклеиваются к буферу по одному (это копирование растущего элемента на каждом куске),
+# а сканируются по отдельности по скобкам и кавычкам, пока элемент не закончится, и склеиваются один раз.
+# Длинные строки (фото в base64) при сканировании пропускаются через str.find, а не посимвольно.
+_SEPARATORS = re.compile(r'[\s,]*')
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+
+
+class _Buffer:
+    """Текст тела с позицией чтения pos. Прочитанное до pos отрезается один раз - при дочитывании куска"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def read(self):
+        """Следующий кусок текста или None, если тело закончилось"""
+        for chunk in self._chunks:
+            if chunk:
+                piece = self._decoder.decode(chunk)
+                if piece:
+                    return piece
+        if not self.eof:
+            self.eof = True
+            return self._decoder.decode(b'', final=True) or None
+        return None
+
+    def more(self) -> bool:
+        """Дочитывает следующий кусок в text (позиции сдвигаются на прежний pos), False - тело закончилось"""
+        piece = self.read()
+        self.text = self.text[self.pos:] + (piece or '')
+        self.pos = 0
+        return piece is not None
+
+
+class _Scan:
+    """Состояние поиска конца элемента, который может быть разбит на несколько кусков"""
+    __slots__ = ('scalar', 'depth', 'in_string', 'escape')
+
+    def __init__(self, first: str):
+        self.scalar = first not in '{["'
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def end(self, piece: str) -> int:
+        """Позиция после конца элемента в piece или -1, если элемент продолжается в следующем куске"""
+        scan = 0
+        if self.escape:
+            self.escape = False
+            scan = 1  # символ после обратного слэша в конце прошлого куска
+        if self.scalar:
+            match = _SCALAR_END.search(piece, scan)
+            return -1 if match is None else match.start()
+        while True:
+            if self.in_string:
+                # внутри строки ищем кавычку и обратный слэш до нее через str.find - это быстрее регулярки
+                quote = piece.find('"', scan)
+                slash = piece.find('\\', scan, len(piece) if quote == -1 else quote)
+                if slash != -1:
+                    scan = slash + 2
+                    if scan > len(piece):
+                        self.escape = True
+                        return -1
+                    continue
+                if quote == -1:
+                    return -1
+                scan = quote + 1
+                self.in_string = False
+                if self.depth == 0:
+                    return scan
+            else:
+                match = _STRUCTURE.search(piece, scan)
+                if match is None:
+                    return -1
+                char = match.group()
+                scan = match.end()
+                if char == '"':
+                    self.in_string = True
+                elif char in '{[':
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        return scan
+
+
+def _read_item(buffer: _Buffer) -> None:
+    """Дочитывает куски, пока не закончится элемент, начатый в buffer.pos, и собирает его в buffer.text"""
+    parts = [buffer.text[buffer.pos:]]
+    scan = _Scan(parts[0][0])
+    end = scan.end(parts[0])
+    while end == -1:
+        piece = buffer.read()
+        if piece is None:
+            if scan.scalar:
+                break  # число или литерал в самом конце тела
+            raise ValueError('Unexpected end of JSON array')
+        parts.append(piece)
+        end = scan.end(piece)
+    buffer.text = ''.join(parts)
+    buffer.pos = 0
+
+
+def iter_array_items(chunks, key: str):
+    """Отдает по одному элементы массива key из JSON объекта верхнего уровня.
+    chunks - итератор кусков тела в байтах (например response.iter_content()).
+    Ключ ищется как первое вхождение "key" - подходит для ответов вида {"key": [...], ...}"""
+    import json  # при первом разборе, а не при импорте api
+
+    buffer = _Buffer(chunks)
+    decoder = json.JSONDecoder()
+    marker = json.dumps(key)
+
+    # ищем начало массива
+    while True:
+        pos = buffer.text.find(marker)
+        if pos != -1:
+            start = buffer.text.find('[', pos + len(marker))
+            if start != -1:
+                buffer.pos = start + 1
+                break
+        if not buffer.more():
+            raise ValueError(f'Key {key!r} with array value not found in response')
+
+    while True:
+        buffer.pos = _SEPARATORS.match(buffer.text, buffer.pos).end()
+        if buffer.pos == len(buffer.text):
+            if not buffer.more():
+                raise ValueError('Unexpected end of JSON array')
+            continue
+        if buffer.text[buffer.pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer.text, buffer.pos)
+            # число или литерал в конце куска может быть обрезан
+            complete = end < len(buffer.text) or isinstance(item, (dict, list, str)) or buffer.eof
+        except json.JSONDecodeError:
+            complete = False
+        if not complete:
+            _read_item(buffer)
+            item, end = decoder.raw_decode(buffer.text, buffer.pos)
+        buffer.pos = end
+        yield item
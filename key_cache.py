@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+import time
+
+from file_lock import atomic_write, locked
+
+
+def credential_hash(email: str, password: str) -> str:
+    """Ключ кэша - хэш пары email/пароль, сами учетные данные нигде не хранятся"""
+    return hashlib.sha256(f'{email}\0{password}'.encode('utf-8')).hexdigest()
+
+
+class ApiKeyCache:
+    """Кэш api ключей PetFriends с временем жизни ttl (секунды).
+
+    Ключи хранятся по хэшу учетных данных. Если указан path, кэш дополнительно хранится в JSON файле,
+    который безопасно делят между собой процессы и воркеры pytest-xdist (запись под файловой
+    блокировкой, замена файла атомарная). Ключ, на который сервер ответил 403, удаляется из кэша"""
+
+    def __init__(self, ttl: float = 600, path: str = None):
+        self.ttl = ttl
+        self.path = path
+        self._entries = {}  # хэш -> (ключ, момент истечения)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, email: str, password: str):
+        """Возвращает закэшированный ключ или None"""
+        digest = credential_hash(email, password)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+        if (entry is None or entry[1] <= now) and self.path:
+            entry = self._load().get(digest)
+            if entry is not None:
+                with self._lock:
+                    self._entries[digest] = entry
+        with self._lock:
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return None
+
+    def put(self, email: str, password: str, key: str) -> None:
+        digest = credential_hash(email, password)
+        entry = (key, time.time() + self.ttl)
+        with self._lock:
+            self._entries[digest] = entry
+        if self.path:
+            self._update(lambda entries: entries.__setitem__(digest, entry))
+
+    def invalidate(self, email: str, password: str) -> None:
+        """Удаляет ключ для учетных данных"""
+        self._remove(lambda digest, key: digest == credential_hash(email, password))
+
+    def invalidate_key(self, key: str) -> None:
+        """Удаляет из кэша api ключ, который сервер перестал принимать"""
+        self._remove(lambda digest, cached_key: cached_key == key)
+
+    def clear(self) -> None:
+        self._remove(lambda digest, key: True)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                'hit_ratio': self.hits / total if total else 0.0}
+
+    def _remove(self, match) -> None:
+        def drop(entries):
+            for digest in [d for d, (key, _) in entries.items() if match(d, key)]:
+                del entries[digest]
+
+        with self._lock:
+            before = len(self._entries)
+            drop(self._entries)
+            if len(self._entries) != before:
+                self.invalidations += 1
+        if self.path:
+            self._update(drop)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {digest: tuple(entry) for digest, entry in data.items() if entry[1] > now}
+
+    def _load(self) -> dict:
+        with locked(self.path + '.lock', shared=True):
+            return self._read()
+
+    def _update(self, change) -> None:
+        """Читает файл, применяет change к словарю записей и атомарно записывает результат"""
+        with locked(self.path + '.lock'):
+            entries = self._read()
+            change(entries)
+            atomic_write(self.path, json.dumps(entries))
@@ -0,0 +1,327 @@
+import atexit
+import contextlib
+import contextvars
+import os
+import queue
+import shutil
+import threading
+import time
+
+# Буферизованная неблокирующая запись логов API.
+# Вызывающий поток только кладет готовую запись в ограниченную очередь, а открытие файла,
+# запись, сброс на диск и ротацию делает фоновый поток - пачками, по размеру пачки или по таймеру.
+# json и gzip импортируются при первой записи jsonl и первой ротации со сжатием, а не при импорте api.
+
+
+class LogConfig:
+    """Настройки лога API.
+
+    fmt - 'text' (блоки --- Request --- / --- Response ---) или 'jsonl' (одна JSON строка на вызов
+    с method, url, status, latency_ms, request_bytes, response_bytes).
+    max_body_bytes - сколько байт тела запроса/ответа попадает в лог (None - без ограничения).
+    max_bytes / rotate_interval - ротация файла по размеру (байты) и по времени (секунды),
+    backup_count - сколько старых файлов хранить, compress - сжимать старые файлы в gzip"""
+
+    def __init__(self, filename: str = 'log.txt', fmt: str = 'text', max_body_bytes: int = 1024,
+                 max_bytes: int = None, rotate_interval: float = None, backup_count: int = 5,
+                 compress: bool = False):
+        if fmt not in ('text', 'jsonl'):
+            raise ValueError(f'Unknown log format: {fmt}')
+        self.filename = filename
+        self.fmt = fmt
+        self.max_body_bytes = max_body_bytes
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+
+
+config = LogConfig()
+
+
+class BufferedLogWriter:
+    """Пишет записи в файл через фоновый поток.
+
+    max_queue - размер очереди; когда она заполнена, новые записи отбрасываются (вызов не ждет).
+    sample_when_busy - когда очередь заполнена больше чем на high_watermark, сохраняется
+    только каждая N-я запись, остальные отбрасываются.
+    batch_size и flush_interval - пачка пишется в файл, как только набралось batch_size записей
+    или прошло flush_interval секунд с первой записи в пачке"""
+
+    def __init__(self, filename: str, max_queue: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 1.0, high_watermark: float = 0.8, sample_when_busy: int = 10,
+                 max_bytes: int = None, rotate_interval: float = None, backup_count: int = 5,
+                 compress: bool = False):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self._next_rotation = time.time() + rotate_interval if rotate_interval else None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_when_busy = max(int(sample_when_busy), 1)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._busy_size = int(max_queue * high_watermark) if max_queue > 0 else 0
+        self._sampled = 0
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'log-writer:{filename}', daemon=True)
+        self._thread.start()
+
+    def write(self, record: str) -> bool:
+        """Ставит запись в очередь. Никогда не блокирует: при перегрузке запись отбрасывается
+        или прореживается, возвращает False, если запись не принята"""
+        if self._closed:
+            return False
+        if self._busy_size and self._queue.qsize() >= self._busy_size:
+            with self._lock:
+                self._sampled += 1
+                keep = self._sampled % self.sample_when_busy == 0
+                if not keep:
+                    self.dropped += 1
+            if not keep:
+                return False
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Дожидается, пока все принятые до вызова записи окажутся в файле"""
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Сбрасывает очередь на диск и останавливает фоновый поток"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {'written': self.written, 'dropped': self.dropped, 'batches': self.batches,
+                'queued': self._queue.qsize()}
+
+    def _run(self) -> None:
+        batch = []
+        deadline = None
+        stop = False
+        while not stop:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ''
+            waiters = []
+            if item is None:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            # забираем все, что уже лежит в очереди, не дожидаясь таймера
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+            if batch and (stop or waiters or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch = []
+                deadline = None
+            for waiter in waiters:
+                waiter.set()
+
+    def _should_rotate(self) -> bool:
+        if self._next_rotation is not None and time.time() >= self._next_rotation:
+            return True
+        if self.max_bytes:
+            try:
+                return os.path.getsize(self.filename) >= self.max_bytes
+            except OSError:
+                return False
+        return False
+
+    def _rotate(self) -> None:
+        """Переименовывает текущий файл в filename.<время>[.gz] и удаляет лишние старые файлы"""
+        if self.rotate_interval:
+            self._next_rotation = time.time() + self.rotate_interval
+        if not os.path.exists(self.filename):
+            return
+        rotated = f'{self.filename}.{time.strftime("%Y%m%d-%H%M%S")}.{time.time_ns() % 10 ** 9:09d}'
+        os.replace(self.filename, rotated)
+        if self.compress:
+            import gzip
+
+            with open(rotated, 'rb') as src, gzip.open(rotated + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        directory, base = os.path.split(os.path.abspath(self.filename))
+        backups = sorted(name for name in os.listdir(directory) if name.startswith(base + '.'))
+        for name in backups[:max(len(backups) - self.backup_count, 0)]:
+            os.remove(os.path.join(directory, name))
+
+    def _write_batch(self, batch: list) -> None:
+        try:
+            if self._should_rotate():
+                self._rotate()
+            with open(self.filename, 'a') as f:
+                f.write(''.join(batch))
+        except OSError:
+            with self._lock:
+                self.dropped += len(batch)
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+# текущая запись лога вызова API - запрос и ответ пишутся одним куском
+_current_record = contextvars.ContextVar('petfriends_log_record', default=None)
+
+
+class _Record:
+    __slots__ = ('filename', 'parts', 'fields', 'started')
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.parts = []
+        self.fields = {}
+        self.started = time.perf_counter()
+
+
+def configure(**kwargs) -> LogConfig:
+    """Меняет настройки лога (см. LogConfig). Открытые писатели сбрасываются на диск и пересоздаются"""
+    global config
+    config = LogConfig(**kwargs)
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+    return config
+
+
+def get_writer(filename: str) -> BufferedLogWriter:
+    """Возвращает общий писатель для файла (один фоновый поток на файл)"""
+    path = os.path.abspath(filename)
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = _writers[path] = BufferedLogWriter(
+                    filename, max_bytes=config.max_bytes, rotate_interval=config.rotate_interval,
+                    backup_count=config.backup_count, compress=config.compress)
+    return writer
+
+
+def truncate(text, limit: int = None) -> str:
+    """Обрезает тело до max_body_bytes из настроек (по байтам в utf-8)"""
+    if limit is None:
+        limit = config.max_body_bytes
+    if not isinstance(text, (str, bytes)):
+        text = str(text)
+    if limit is None:
+        return text if isinstance(text, str) else text.decode('utf-8', 'replace')
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    if len(data) <= limit:
+        return data.decode('utf-8', 'replace')
+    return data[:limit].decode('utf-8', 'ignore') + f'...<{len(data) - limit} bytes truncated>'
+
+
+def append(filename: str, content: str) -> None:
+    """Добавляет текст в лог. Внутри record() текст копится и уходит в файл вместе с остальной записью"""
+    current = _current_record.get()
+    if current is not None and current.filename == filename:
+        current.parts.append(content)
+    elif config.fmt == 'jsonl':
+        import json
+
+        get_writer(filename).write(json.dumps({'ts': time.time(), 'message': content}, ensure_ascii=False) + '\n')
+    else:
+        get_writer(filename).write(content)
+
+
+def note(**fields) -> None:
+    """Добавляет поля (method, url, status, request_bytes, ...) в структурированную запись текущего вызова"""
+    current = _current_record.get()
+    if current is not None:
+        current.fields.update(fields)
+
+
+def note_response(response, *args, **kwargs):
+    """Хук ответа для requests.Session: записывает метод, url, статус и размеры запроса и ответа.
+    При stream=True тело не читается, размер берется из Content-Length"""
+    current = _current_record.get()
+    if current is None:
+        return response
+    request = response.request
+    fields = {'method': request.method, 'url': request.url, 'status': response.status_code,
+              'request_bytes': int(request.headers.get('Content-Length') or 0)}
+    if kwargs.get('stream'):
+        fields['response_bytes'] = int(response.headers.get('Content-Length') or 0)
+    else:
+        fields['response_bytes'] = len(response.content)
+    if config.fmt == 'jsonl' and config.max_body_bytes != 0:
+        if isinstance(request.body, (str, bytes)):
+            fields['request_body'] = truncate(request.body)
+        if not kwargs.get('stream'):
+            fields['response_body'] = truncate(response.content)
+    current.fields.update(fields)
+    return response
+
+
+@contextlib.contextmanager
+def record(filename: str = None):
+    """Собирает все, что пишется в лог внутри блока, в одну запись и отдает писателю целиком,
+    чтобы запрос и ответ одного вызова не перемешивались с записями других потоков.
+    В формате jsonl вместо текста пишется одна JSON строка с полями из note()"""
+    current = _Record(filename or config.filename)
+    token = _current_record.set(current)
+    try:
+        yield current
+    finally:
+        _current_record.reset(token)
+        if config.fmt == 'jsonl':
+            import json
+
+            fields = {'ts': time.time(), 'latency_ms': round((time.perf_counter() - current.started) * 1000, 3)}
+            fields.update(current.fields)
+            get_writer(current.filename).write(json.dumps(fields, ensure_ascii=False, default=str) + '\n')
+        elif current.parts:
+            get_writer(current.filename).write(''.join(current.parts))
+
+
+def flush_all(timeout: float = None) -> None:
+    for writer in list(_writers.values()):
+        writer.flush(timeout)
+
+
+@atexit.register
+def close_all() -> None:
+    """Дописывает все буферы при завершении интерпретатора"""
+    for writer in list(_writers.values()):
+        writer.close()
@@ -0,0 +1,114 @@
+import sys
+
+# Компактные представления питомцев для случаев, когда их в памяти сотни тысяч.
+# Pet - запись на __slots__ без __dict__, PetList - колоночное хранение (один список на поле).
+
+PET_FIELDS = ('id', 'name', 'animal_type', 'age', 'pet_photo', 'created_at', 'user_id')
+
+# поля с небольшим числом разных значений - строки интернируются, одинаковые значения хранятся один раз
+_INTERNED = frozenset(('animal_type', 'user_id'))
+
+
+def _intern(field: str, value):
+    if field in _INTERNED and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+class Pet:
+    """Питомец с полями, которые возвращает API"""
+    __slots__ = PET_FIELDS
+
+    def __init__(self, id=None, name=None, animal_type=None, age=None, pet_photo=None, created_at=None,
+                 user_id=None):
+        self.id = id
+        self.name = name
+        self.animal_type = animal_type
+        self.age = age
+        self.pet_photo = pet_photo
+        self.created_at = created_at
+        self.user_id = user_id
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Pet':
+        """Создает запись из словаря ответа API, лишние ключи игнорируются"""
+        get = data.get
+        return cls(get('id'), get('name'), get('animal_type'), get('age'), get('pet_photo'),
+                   get('created_at'), get('user_id'))
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'name': self.name, 'animal_type': self.animal_type, 'age': self.age,
+                'pet_photo': self.pet_photo, 'created_at': self.created_at, 'user_id': self.user_id}
+
+    def __eq__(self, other):
+        if not isinstance(other, Pet):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in PET_FIELDS)
+
+    def __repr__(self):
+        return f'Pet(id={self.id!r}, name={self.name!r}, animal_type={self.animal_type!r}, age={self.age!r})'
+
+
+class PetList:
+    """Колоночный список питомцев: каждое поле хранится отдельным списком.
+    Индексация возвращает Pet, срез - новый PetList, to_dicts() - список словарей как в ответе API"""
+    __slots__ = ('_columns',)
+
+    def __init__(self, pets=()):
+        self._columns = {field: [] for field in PET_FIELDS}
+        self.extend(pets)
+
+    @classmethod
+    def from_dicts(cls, pets) -> 'PetList':
+        return cls(pets)
+
+    def append(self, pet) -> None:
+        """Добавляет питомца - Pet или словарь из ответа API"""
+        if isinstance(pet, Pet):
+            for field in PET_FIELDS:
+                self._columns[field].append(_intern(field, getattr(pet, field)))
+        else:
+            for field in PET_FIELDS:
+                self._columns[field].append(_intern(field, pet.get(field)))
+
+    def extend(self, pets) -> None:
+        for pet in pets:
+            self.append(pet)
+
+    def column(self, field: str) -> list:
+        """Все значения одного поля (сам список колонки, не копия)"""
+        return self._columns[field]
+
+    def find(self, pet_id: str):
+        """Питомец по id или None"""
+        try:
+            index = self._columns['id'].index(pet_id)
+        except ValueError:
+            return None
+        return self[index]
+
+    def __len__(self):
+        return len(self._columns['id'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            result = PetList()
+            for field in PET_FIELDS:
+                result._columns[field] = self._columns[field][index]
+            return result
+        return Pet(*(self._columns[field][index] for field in PET_FIELDS))
+
+    def __iter__(self):
+        columns = [self._columns[field] for field in PET_FIELDS]
+        for values in zip(*columns):
+            yield Pet(*values)
+
+    def __contains__(self, pet_id):
+        return pet_id in self._columns['id']
+
+    def to_dicts(self) -> list:
+        columns = [self._columns[field] for field in PET_FIELDS]
+        return [dict(zip(PET_FIELDS, values)) for values in zip(*columns)]
+
+    def __repr__(self):
+        return f'PetList({len(self)} pets)'
@@ -0,0 +1,204 @@
+import io
+import mmap
+import os
+import uuid
+
+# Потоковый multipart/form-data для загрузки фото: тело не собирается в памяти целиком,
+# а отдается requests частями по мере отправки. Длина известна заранее, поэтому
+# запрос уходит с Content-Length, без chunked.
+
+CHUNK_SIZE = 64 * 1024
+
+# сигнатуры форматов изображений: (смещение, байты, mime)
+_SIGNATURES = (
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (8, b'WEBP', 'image/webp'),
+    (0, b'BM', 'image/bmp'),
+    (4, b'ftypheic', 'image/heic'),
+    (4, b'ftypavif', 'image/avif'),
+)
+
+_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif', 'image/webp': '.webp',
+               'image/bmp': '.bmp', 'image/heic': '.heic', 'image/avif': '.avif'}
+
+
+def detect_mime(head: bytes) -> str:
+    """Определяет MIME тип изображения по первым байтам содержимого"""
+    for offset, signature, mime in _SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime
+    return 'application/octet-stream'
+
+
+class _FilePart:
+    """Файловая часть формы. Источник - путь, bytes или открытый бинарный файл.
+    Файлы, открытые самим кодировщиком, закрываются им же"""
+
+    def __init__(self, source, use_mmap: bool = False):
+        self._owned = None
+        self._mmap = None
+        self._data = None
+        self._file = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._data = memoryview(source)
+            self.size = len(self._data)
+            head = bytes(self._data[:16])
+            name = None
+        elif isinstance(source, (str, os.PathLike)):
+            name = os.path.basename(os.fspath(source))
+            self._owned = self._file = open(source, 'rb')
+            self.size = os.fstat(self._file.fileno()).st_size
+            if use_mmap and self.size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                head = self._mmap[:16]
+            else:
+                head = self._file.read(16)
+                self._file.seek(0)
+        else:
+            name = os.path.basename(getattr(source, 'name', '') or '') or None
+            self._file = source
+            if source.seekable():
+                start = source.tell()
+                self.size = source.seek(0, io.SEEK_END) - start
+                source.seek(start)
+                head = source.read(16)
+                source.seek(start)
+            else:
+                # поток без seek (сокет, pipe) - длину не узнать, читаем в память
+                self._data = memoryview(source.read())
+                self._file = None
+                self.size = len(self._data)
+                head = bytes(self._data[:16])
+        self.content_type = detect_mime(head)
+        self.filename = name or 'photo' + _EXTENSIONS.get(self.content_type, '')
+        self._pos = 0
+
+    @property
+    def on_disk(self) -> bool:
+        """Части читаются из файла или mmap, а не из памяти"""
+        return self._data is None
+
+    def read(self, size: int):
+        size = min(size, self.size - self._pos)
+        if size <= 0:
+            self.close()
+            return b''
+        if self._data is not None:
+            chunk = self._data[self._pos:self._pos + size]
+        elif self._mmap is not None:
+            chunk = self._mmap[self._pos:self._pos + size]
+        else:
+            chunk = self._file.read(size)
+        self._pos += len(chunk)
+        if self._pos >= self.size:
+            self.close()
+        return chunk
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._owned is not None:
+            self._owned.close()
+            self._owned = None
+
+
+class MultipartEncoder:
+    """Потоковое тело multipart/form-data.
+
+    fields - обычные поля формы, files - {имя поля: путь | bytes | бинарный файл}.
+    Фото читается кусками по chunk_size (или из mmap при use_mmap=True), MIME тип
+    определяется по содержимому. Открытые кодировщиком файлы закрываются, как только
+    прочитаны до конца, а также в close() - используйте with MultipartEncoder(...) as body"""
+
+    def __init__(self, fields: dict = None, files: dict = None, chunk_size: int = CHUNK_SIZE,
+                 use_mmap: bool = False):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self._parts = []
+        self._files = []
+        try:
+            for name, value in (fields or {}).items():
+                header = (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                          f'{value}\r\n')
+                self._parts.append(memoryview(header.encode('utf-8')))
+            for name, source in (files or {}).items():
+                part = _FilePart(source, use_mmap)
+                self._files.append(part)
+                header = (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                          f'filename="{part.filename}"\r\nContent-Type: {part.content_type}\r\n\r\n')
+                self._parts.extend((memoryview(header.encode('utf-8')), part, memoryview(b'\r\n')))
+        except BaseException:
+            self.close()
+            raise
+        self._parts.append(memoryview(f'--{self.boundary}--\r\n'.encode('utf-8')))
+        self.len = sum(len(p) if isinstance(p, memoryview) else p.size for p in self._parts)
+        self._index = 0
+        self._offset = 0
+
+    def __len__(self):
+        return self.len
+
+    def read(self, size: int = -1):
+        """Возвращает следующий кусок тела (не больше size байт, но может быть и меньше).
+        Пустой результат - тело закончилось"""
+        if size is None or size < 0:
+            size = self.chunk_size
+        while self._index < len(self._parts):
+            chunk = self._read_part(size)
+            if chunk:
+                return chunk
+            self._index += 1
+            self._offset = 0
+        return b''
+
+    def _read_part(self, size: int):
+        # кусок только текущей части; пустой - часть закончилась
+        part = self._parts[self._index]
+        if isinstance(part, memoryview):
+            chunk = part[self._offset:self._offset + size]
+            self._offset += len(chunk)
+            return chunk
+        return part.read(min(size, self.chunk_size))
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    async def __aiter__(self):
+        # то же тело для aiohttp (data=encoder). Куски файла (и mmap) читаются в потоке asyncio.to_thread,
+        # чтобы чтение с диска не останавливало цикл событий; заголовки и bytes отдаются сразу
+        import asyncio
+
+        while self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, _FilePart) and part.on_disk:
+                chunk = await asyncio.to_thread(self._read_part, self.chunk_size)
+            else:
+                chunk = self._read_part(self.chunk_size)
+            if chunk:
+                yield bytes(chunk)
+            else:
+                self._index += 1
+                self._offset = 0
+
+    def to_bytes(self) -> bytes:
+        """Все тело одним куском - для отладки и маленьких форм"""
+        return b''.join(bytes(chunk) for chunk in self)
+
+    def close(self) -> None:
+        for part in self._files:
+            part.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+import time
+
+from models import PET_FIELDS, Pet
+
+# Локальное зеркало питомцев пользователя в SQLite с индексами по id, name и animal_type.
+# Изменения, сделанные через тот же клиент PetFriends, применяются сразу (post хук инструментирования),
+# а расхождения с сервером подтягиваются периодической сверкой sync().
+
+_COLUMNS = ', '.join(PET_FIELDS)
+_PLACEHOLDERS = ', '.join('?' * len(PET_FIELDS))
+# методы клиента, после которых питомец из ответа записывается в зеркало
+_UPSERT_METHODS = frozenset(('add_new_pet', 'add_new_pet_without_photo', 'update_pet_info', 'add_pet_photo'))
+
+
+class PetMirror:
+    """Зеркало списка get_list_of_pets(auth_key, filter) для пользователя с ключом auth_key.
+
+    path - файл базы SQLite (':memory:' - в памяти процесса). sync_interval - если задан,
+    maybe_sync() сверяется с сервером не чаще раза в sync_interval секунд, start() делает это в фоновом потоке.
+    Поиск - get(), find(), ids() - идет по индексам локальной базы без запросов к API.
+    Закрывать методом close() или использовать как контекстный менеджер"""
+
+    def __init__(self, pf, auth_key: dict, path: str = ':memory:', filter: str = 'my_pets',
+                 sync_interval: float = None):
+        self.pf = pf
+        self.auth_key = auth_key
+        self.filter = filter
+        self.sync_interval = sync_interval
+        self.last_sync = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.executescript(f'''
+            CREATE TABLE IF NOT EXISTS pets (id TEXT PRIMARY KEY, {', '.join(PET_FIELDS[1:])});
+            CREATE INDEX IF NOT EXISTS pets_name ON pets (name);
+            CREATE INDEX IF NOT EXISTS pets_animal_type ON pets (animal_type);
+        ''')
+        self._hook = pf.add_hook(post=self._apply)
+
+    def close(self) -> None:
+        self.stop()
+        self.pf.remove_hook(self._hook)
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # поиск
+
+    def get(self, pet_id: str, as_records: bool = False):
+        """Питомец по id или None"""
+        rows = self._query(f'SELECT {_COLUMNS} FROM pets WHERE id = ?', (pet_id,))
+        return self._convert(rows, as_records)[0] if rows else None
+
+    def find(self, name: str = None, animal_type: str = None, as_records: bool = False) -> list:
+        """Питомцы с указанными именем и/или видом"""
+        conditions, params = [], []
+        for column, value in (('name', name), ('animal_type', animal_type)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        return self._convert(self._query(f'SELECT {_COLUMNS} FROM pets{where}', params), as_records)
+
+    def ids(self) -> list:
+        return [row[0] for row in self._query('SELECT id FROM pets')]
+
+    def __contains__(self, pet_id: str) -> bool:
+        return bool(self._query('SELECT 1 FROM pets WHERE id = ?', (pet_id,)))
+
+    def __len__(self) -> int:
+        return self._query('SELECT COUNT(*) FROM pets')[0][0]
+
+    # синхронизация
+
+    def sync(self) -> dict:
+        """Сверяет зеркало с сервером: список читается потоком (iter_pets), в базу пишутся только
+        новые, измененные и удаленные питомцы. Возвращает {'added', 'updated', 'removed'}"""
+        remote = {}
+        for pet in self.pf.iter_pets(self.auth_key, self.filter):
+            remote[pet['id']] = tuple(pet.get(field) for field in PET_FIELDS)
+        with self._lock:
+            local = {row[0]: row for row in self._db.execute(f'SELECT {_COLUMNS} FROM pets')}
+            added = [row for pet_id, row in remote.items() if pet_id not in local]
+            updated = [row for pet_id, row in remote.items() if pet_id in local and local[pet_id] != row]
+            removed = [(pet_id,) for pet_id in local if pet_id not in remote]
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany(f'INSERT OR REPLACE INTO pets ({_COLUMNS}) VALUES ({_PLACEHOLDERS})',
+                                     added + updated)
+                self._db.executemany('DELETE FROM pets WHERE id = ?', removed)
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+        self.last_sync = time.monotonic()
+        return {'added': len(added), 'updated': len(updated), 'removed': len(removed)}
+
+    def maybe_sync(self):
+        """sync(), если с прошлой сверки прошло sync_interval секунд (или ее еще не было)"""
+        if self.last_sync is None or (self.sync_interval is not None
+                                      and time.monotonic() - self.last_sync >= self.sync_interval):
+            return self.sync()
+        return None
+
+    def start(self) -> 'PetMirror':
+        """Запускает фоновую сверку раз в sync_interval секунд"""
+        if self.sync_interval is None:
+            raise ValueError('sync_interval is required for background sync')
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pet-mirror-sync', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception:
+                pass  # сервер недоступен - попробуем на следующем круге
+            self._stop.wait(self.sync_interval)
+
+    def _apply(self, call) -> None:
+        # post хук клиента: изменения, сделанные через клиент, сразу попадают в зеркало.
+        # Конвейер передает аргументы метода только в call.kwargs (pipeline.ApiCall.arguments)
+        if call.status != 200 or (call.method not in _UPSERT_METHODS and call.method != 'delete_pet'):
+            return
+        if call.kwargs['auth_key'].get('key') != self.auth_key.get('key'):
+            return
+        if call.method == 'delete_pet':
+            self._execute('DELETE FROM pets WHERE id = ?', (call.kwargs['pet_id'],))
+            return
+        pet = call.result.to_dict() if isinstance(call.result, Pet) else call.result
+        if isinstance(pet, dict) and pet.get('id'):
+            self._execute(f'INSERT OR REPLACE INTO pets ({_COLUMNS}) VALUES ({_PLACEHOLDERS})',
+                          tuple(pet.get(field) for field in PET_FIELDS))
+
+    def _execute(self, sql: str, params=()) -> None:
+        with self._lock:
+            self._db.execute(sql, params)
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _convert(rows: list, as_records: bool) -> list:
+        if as_records:
+            return [Pet(*row) for row in rows]
+        return [dict(zip(PET_FIELDS, row)) for row in rows]
@@ -0,0 +1,40 @@
+import threading
+import time
+
+# Учет питомцев, созданных через клиент PetFriends, - чтобы тесты и скрипты могли убрать за собой
+# (PetFriends.cleanup), не перебирая весь список my_pets.
+
+
+class PetRegistry:
+    """Потокобезопасный реестр id созданных питомцев с api ключом, которым их можно удалить"""
+
+    def __init__(self):
+        self._pets = {}  # id -> (api ключ, момент создания)
+        self._lock = threading.Lock()
+
+    def add(self, api_key: str, pet_id: str) -> None:
+        with self._lock:
+            self._pets[pet_id] = (api_key, time.time())
+
+    def discard(self, pet_id: str) -> None:
+        with self._lock:
+            self._pets.pop(pet_id, None)
+
+    def take(self) -> dict:
+        """Забирает все записи из реестра: {api ключ: [id, ...]}"""
+        with self._lock:
+            pets, self._pets = self._pets, {}
+        by_key = {}
+        for pet_id, (api_key, _) in pets.items():
+            by_key.setdefault(api_key, []).append(pet_id)
+        return by_key
+
+    def ids(self) -> list:
+        with self._lock:
+            return list(self._pets)
+
+    def __contains__(self, pet_id: str) -> bool:
+        return pet_id in self._pets
+
+    def __len__(self) -> int:
+        return len(self._pets)
@@ -0,0 +1,213 @@
+import hashlib
+import importlib.util
+import io
+import os
+import stat
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from file_lock import atomic_write
+
+# Подготовка фото перед загрузкой: уменьшение до max_size по большей стороне, пережатие с quality
+# и удаление метаданных (EXIF, ICC, комментарии). Результат кэшируется на диске по хэшу содержимого
+# и параметров, поэтому одно и то же фото обрабатывается один раз даже между запусками.
+# Нужен Pillow; без него фото отправляются как есть.
+# Кэш личный: каталог создается с правами 0o700, файлы - 0o600, и кэшу верят, только если каталог
+# принадлежит текущему пользователю и никто другой не может в него писать (иначе подложат чужое фото).
+
+_uid = getattr(os, 'getuid', None)  # на Windows нет, там временный каталог и так свой у пользователя
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(),
+                                 f'petfriends-photos-{_uid()}' if _uid else 'petfriends-photos')
+
+# форматы, которые имеет смысл пережимать; остальные (GIF с анимацией и т.п.) отправляются как есть
+_FORMATS = frozenset(('JPEG', 'PNG', 'WEBP', 'BMP', 'TIFF'))
+
+
+def pillow_available() -> bool:
+    return importlib.util.find_spec('PIL') is not None
+
+
+def _read(source) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    return source.read()
+
+
+def _private_dir(path: str) -> bool:
+    """Создает каталог path (0o700), если его нет. True - каталог наш и закрыт на запись для остальных"""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)  # lstat: симлинк на чужой каталог не считается каталогом
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+    return _uid is None or (info.st_uid == _uid() and not info.st_mode & 0o022)
+
+
+def encode(data: bytes, max_size: int, quality: int, strip_metadata: bool) -> bytes:
+    """Уменьшает и пережимает изображение. Непрозрачные картинки сохраняются в JPEG, с прозрачностью - в PNG.
+    Если картинка не уменьшалась и не стала меньше, возвращаются исходные байты
+    (при strip_metadata - только когда в исходнике нет метаданных)"""
+    from PIL import Image, ImageOps
+
+    try:
+        original = Image.open(io.BytesIO(data))
+    except OSError:
+        return data  # не изображение - отправляем как есть, пусть решает сервер
+    with original:
+        if original.format not in _FORMATS:
+            return data
+        had_metadata = bool(original.info.get('exif') or original.info.get('icc_profile')
+                            or original.getexif())
+        # поворот по EXIF применяется к пикселям, иначе после удаления EXIF фото окажется повернутым
+        image = ImageOps.exif_transpose(original)
+        resized = max(image.size) > max_size
+        if resized:
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        params = {}
+        if not strip_metadata:
+            for name in ('exif', 'icc_profile'):
+                if original.info.get(name):
+                    params[name] = original.info[name]
+        out = io.BytesIO()
+        if has_alpha:
+            image.save(out, 'PNG', optimize=True, **params)
+        else:
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.save(out, 'JPEG', quality=quality, optimize=True, **params)
+    result = out.getvalue()
+    if not resized and len(result) >= len(data) and not (strip_metadata and had_metadata):
+        return data
+    return result
+
+
+class PhotoPreprocessor:
+    """Подготовка фото для add_new_pet / add_pet_photo: PetFriends(photo_preprocessor=PhotoPreprocessor()).
+
+    max_size - максимальная сторона в пикселях, quality - качество JPEG (1-95),
+    strip_metadata - удалять EXIF/ICC. cache_dir - каталог дискового кэша (None - без кэша);
+    если каталог чужой или открыт на запись другим, кэш не используется.
+    workers > 0 - пережатие в пуле из workers процессов: пакетные add_pets из нескольких потоков
+    грузят все ядра, а не упираются в GIL. Пул закрывается в close()"""
+
+    def __init__(self, max_size: int = 1280, quality: int = 85, strip_metadata: bool = True,
+                 cache_dir: str = DEFAULT_CACHE_DIR, workers: int = 0):
+        self.max_size = max_size
+        self.quality = quality
+        self.strip_metadata = strip_metadata
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.available = pillow_available()
+        self._pool = None
+        self._lock = threading.Lock()
+        self._cache_trusted = None  # каталог кэша проверяется при первом обращении
+        self.processed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def process(self, source):
+        """Подготовленное фото (bytes) из пути, bytes или бинарного файла.
+        Без Pillow source возвращается как есть, не читаясь, - путь или файл потом отправляется потоком"""
+        if not self.available:
+            return source
+        return self._prepare(_read(source))
+
+    def _prepare(self, data: bytes, digest: str = None) -> bytes:
+        path = self._cache_path(data, digest)
+        result = self._load(path)
+        if result is not None:
+            with self._lock:
+                self.cache_hits += 1
+            return result
+        args = (data, self.max_size, self.quality, self.strip_metadata)
+        result = self._get_pool().submit(encode, *args).result() if self.workers else encode(*args)
+        self._store(path, result)
+        with self._lock:
+            self.processed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(result)
+        return result
+
+    def process_many(self, sources) -> list:
+        """Подготавливает несколько фото (в пуле процессов, если workers > 0), порядок сохраняется"""
+        sources = list(sources)
+        if not self.available or not self.workers or len(sources) < 2:
+            return [self.process(source) for source in sources]
+        # одинаковые фото пережимаются один раз: в пул уходят только разные по хэшу, повторы считаются попаданиями
+        digests, unique = [], {}
+        for source in sources:
+            data = _read(source)
+            digest = self._digest(data)
+            digests.append(digest)
+            unique.setdefault(digest, data)
+        with self._lock:
+            self.cache_hits += len(sources) - len(unique)
+        # потоки только ждут пул процессов и работают с кэшем
+        with ThreadPoolExecutor(max_workers=self.workers) as threads:
+            results = dict(zip(unique, threads.map(self._prepare, unique.values(), unique)))
+        return [results[digest] for digest in digests]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'processed': self.processed, 'cache_hits': self.cache_hits, 'bytes_in': self.bytes_in,
+                    'bytes_out': self.bytes_out,
+                    'saved_ratio': 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0}
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _digest(self, data: bytes) -> str:
+        digest = hashlib.sha256(data)
+        digest.update(f'|{self.max_size}|{self.quality}|{int(self.strip_metadata)}'.encode('ascii'))
+        return digest.hexdigest()
+
+    def _cache_path(self, data: bytes, digest: str = None):
+        if not self.cache_dir:
+            return None
+        if self._cache_trusted is None:
+            self._cache_trusted = _private_dir(self.cache_dir)
+        if not self._cache_trusted:
+            return None
+        return os.path.join(self.cache_dir, digest or self._digest(data))
+
+    @staticmethod
+    def _load(path):
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _store(path, data: bytes) -> None:
+        if path is None:
+            return
+        try:
+            atomic_write(path, data)
+        except OSError:
+            pass  # кэш - только ускорение, без него фото все равно отправится
@@ -0,0 +1,329 @@
+"""Конвейер выполнения запросов PetFriends.
+
+Публичные методы клиента только описывают вызов (ApiCall: HTTP метод, путь, параметры, данные, фото)
+и отдают его конвейеру. Вызов проходит через стадии по порядку, каждая стадия - функция
+stage(client, call, proceed), которая делает свою часть работы и вызывает proceed(call) для следующей:
+
+    auth      - заголовок auth_key из ключа пользователя (первой, чтобы ключ попал в лог)
+    metrics   - хуки инструментирования (pf.add_hook), без хуков стадия ничего не делает
+    log       - запрос и ответ одного вызова одной записью в лог (log_writer)
+    records   - as_records=True: models.Pet / models.PetList вместо словарей
+    registry  - учет созданных и удаленных питомцев (pf.created), сброс кэша ответов после изменений
+    decode    - разбор ответа (json_codec) в (статус, результат)
+    cache     - кэш api ключей (key_cache) и кэш ответов get_list_of_pets (response_cache)
+    coalesce  - объединение одинаковых одновременных GET (single_flight)
+    transport - запрос через сессию клиента; повторы, предохранитель, ограничение частоты и кассета
+                работают в адаптере сессии (adapter.PooledAdapter), то есть для каждой HTTP попытки
+
+Стадии выше decode получают (статус, результат), ниже - requests.Response (или уже готовый кортеж,
+например ответ из кэша, который decode пропускает как есть). Цепочка собирается один раз при создании
+клиента, на вызов создается только ApiCall.
+
+Вызов со stream (iter_pets) идет через те же стадии, но тело не читается сразу: decode отдает PetStream,
+который разбирает питомцев по мере итерации, а запись в лог делается, когда поток закрыт
+(прочитан до конца, остановлен или брошен) - с числом прочитанных питомцев.
+
+Накладные расходы конвейера на вызов в сравнении с прежним телом метода (запрос, лог, разбор ответа):
+    python -m pipeline --calls 2000
+"""
+import functools
+import time
+
+import json_codec
+import log_writer
+from json_stream import iter_array_items
+from models import Pet, PetList
+
+
+class ApiCall:
+    """Описание одного вызова API. auth_key - словарь с ключом пользователя ({'key': ...}),
+    files - фото для multipart ({'pet_photo': путь, bytes или файл}), cache - 'key' или 'pets' для
+    стадии cache, records - 'pet' или 'list' для стадии records, creates/deletes - питомец создается
+    или удаляется (стадия registry), stream - размер куска для потокового чтения ответа (PetStream).
+    note - пометка для лога, которую ставят стадии (например, попадание в кэш)"""
+    __slots__ = ('name', 'method', 'path', 'url', 'auth_key', 'headers', 'params', 'data', 'files',
+                 'cache', 'records', 'creates', 'deletes', 'pet_id', 'stream', 'note')
+
+    def __init__(self, name: str, method: str, path: str, auth_key: dict = None, headers: dict = None,
+                 params: dict = None, data: dict = None, files: dict = None, cache: str = None,
+                 records: str = None, creates: bool = False, deletes: bool = False, pet_id: str = None,
+                 stream: int = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.url = None
+        self.auth_key = auth_key
+        self.headers = headers if headers is not None else {}
+        self.params = params
+        self.data = data
+        self.files = files
+        self.cache = cache
+        self.records = records
+        self.creates = creates
+        self.deletes = deletes
+        self.pet_id = pet_id
+        self.stream = stream
+        self.note = None
+
+    def arguments(self) -> dict:
+        """Аргументы вызова по именам параметров публичного метода - для хуков (CallMetrics.kwargs)"""
+        arguments = {**(self.params or {}), **(self.data or {}), **(self.files or {})}
+        if self.auth_key is not None:
+            arguments['auth_key'] = self.auth_key
+        if self.pet_id is not None:
+            arguments['pet_id'] = self.pet_id
+        return arguments
+
+    def __repr__(self):
+        return f'ApiCall({self.name!r}, {self.method} {self.path})'
+
+
+class PetStream:
+    """Питомцы из потокового ответа api/pets: тело читается кусками и разбирается по мере итерации.
+    Поток закрывается (и соединение освобождается), когда прочитан до конца, найден питомец stop_at_id
+    или вызван close(). При статусе ответа, отличном от 200, итерация выбрасывает requests.HTTPError"""
+
+    def __init__(self, response, chunk_size: int):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.stop_at_id = None
+        self.as_records = False
+        self.count = 0
+        self.on_close = None
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            self.response.raise_for_status()
+            for pet in iter_array_items(self.response.iter_content(self.chunk_size), 'pets'):
+                self.count += 1
+                yield Pet.from_dict(pet) if self.as_records else pet
+                if self.stop_at_id is not None and pet.get('id') == self.stop_at_id:
+                    break
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.response.close()
+        if self.on_close is not None:
+            self.on_close(self)
+
+    def __repr__(self):
+        return f'<streamed {self.count} pets>'
+
+
+def auth(client, call: ApiCall, proceed):
+    if call.auth_key is not None:
+        call.headers['auth_key'] = call.auth_key['key']
+    return proceed(call)
+
+
+def metrics(client, call: ApiCall, proceed):
+    # замеры и хуки только если они зарегистрированы - иначе вызов идет без лишних объектов
+    hooks = client.instrumentation
+    if hooks:
+        return hooks.run(call.name, lambda *args, **kwargs: proceed(call), (client,), call.arguments())
+    return proceed(call)
+
+
+def log(client, call: ApiCall, proceed):
+    # заголовки, параметры и данные берутся до запроса: стадии ниже могут дополнить их (валидаторы кэша)
+    request = f'\n--- Request ---\nURL: {call.url}, \nHeaders: {call.headers}'
+    if call.params is not None:
+        request += f', \nParams: {call.params}'
+    if call.data is not None:
+        request += f', \nData: {call.data}'
+    if call.stream is not None:
+        # ответ еще не прочитан - запись уходит в лог, когда поток закроется
+        status, result = proceed(call)
+        result.on_close = functools.partial(_log_stream, request, call)
+        return status, result
+    # Запрос и ответ одного вызова копятся в одну запись и уходят в фоновый писатель целиком
+    with log_writer.record():
+        status, result = proceed(call)
+        if call.note:
+            request += f' ({call.note})'
+        log_writer.append(log_writer.config.filename,
+                          f'{request}\n--- Response ---\nStatus: {status}\nResponse: {log_writer.truncate(result)}\n')
+    return status, result
+
+
+def _log_stream(request: str, call: ApiCall, stream: PetStream) -> None:
+    status = stream.response.status_code
+    with log_writer.record():
+        log_writer.append(log_writer.config.filename,
+                          f'{request}\n--- Response ---\nStatus: {status}\nResponse: {stream!r}\n')
+        log_writer.note(method=call.method, url=stream.response.url, status=status, streamed_items=stream.count)
+
+
+def records(client, call: ApiCall, proceed):
+    status, result = proceed(call)
+    if isinstance(result, PetStream):
+        result.as_records = call.records is not None
+    elif call.records is not None and status == 200 and isinstance(result, dict):
+        result = PetList(result.get('pets', ())) if call.records == 'list' else Pet.from_dict(result)
+    return status, result
+
+
+def registry(client, call: ApiCall, proceed):
+    status, result = proceed(call)
+    if call.method != 'GET':
+        # после любого изменения питомцев списки этого ключа в кэше устарели
+        if client.response_cache is not None:
+            client.response_cache.invalidate(call.auth_key['key'])
+        if status == 200:
+            if call.creates and isinstance(result, dict) and 'id' in result:
+                client.created.add(call.auth_key['key'], result['id'])
+            elif call.deletes:
+                client.created.discard(call.pet_id)
+    return status, result
+
+
+def decode(client, call: ApiCall, proceed):
+    res = proceed(call)
+    if isinstance(res, tuple):
+        return res
+    if call.stream is not None:
+        return res.status_code, PetStream(res, call.stream)
+    return res.status_code, json_codec.decode_response(res)
+
+
+def cache(client, call: ApiCall, proceed):
+    if call.cache == 'key' and client.key_cache is not None:
+        email, passwd = call.headers['email'], call.headers['password']
+        key = client.key_cache.get(email, passwd)
+        if key is not None:
+            call.note = 'key cache hit'
+            log_writer.note(method=call.method, url=call.url, status=200, cache='hit')
+            return 200, {'key': key}
+        res = proceed(call)
+        result = json_codec.decode_response(res)
+        if res.status_code == 200 and isinstance(result, dict) and 'key' in result:
+            client.key_cache.put(email, passwd, result['key'])
+        return res.status_code, result
+    if call.cache == 'pets' and client.response_cache is not None:
+        # свежий ответ берется из кэша без запроса, устаревший - перепроверяется условным запросом
+        headers = call.headers
+
+        def send(validators):
+            call.headers = {**headers, **validators}
+            return proceed(call)
+
+        status, content, state = client.response_cache.fetch((headers['auth_key'], call.params['filter']), send)
+        call.note = f'response cache {state}'
+        log_writer.note(status=status, cache=state)
+        return status, json_codec.decode(content)
+    return proceed(call)
+
+
+def coalesce(client, call: ApiCall, proceed):
+    # одинаковые одновременные GET идут в сеть один раз, а ответ (разбирает его каждый вызов сам) получают все
+    if client.single_flight is None or call.method != 'GET' or call.stream is not None:
+        return proceed(call)
+    key = (call.url, tuple(sorted(call.headers.items())), tuple(sorted((call.params or {}).items())))
+    res, shared = client.single_flight.do(key, lambda: proceed(call))
+    if shared:
+        # хуки ответа сработали только у выполнившего запрос - отмечаем в логе, откуда ответ
+        log_writer.note(method='GET', url=res.url, status=res.status_code, coalesced=True)
+    return res
+
+
+def transport(client, call: ApiCall):
+    if call.files is None:
+        return client.session.request(call.method, call.url, headers=call.headers, params=call.params,
+                                      data=call.data, stream=call.stream is not None)
+    from multipart import MultipartEncoder
+
+    files = call.files
+    if client.photo_preprocessor is not None:
+        files = {name: client.photo_preprocessor.process(photo) for name, photo in files.items()}
+    # фото отправляется потоком и файл закрывается сразу после отправки
+    with MultipartEncoder(call.data, files) as body:
+        return client.session.request(call.method, call.url, data=body,
+                                      headers={**call.headers, 'Content-Type': body.content_type})
+
+
+STAGES = (auth, metrics, log, records, registry, decode, cache, coalesce)
+
+
+class Pipeline:
+    """Цепочка стадий для клиента client, заканчивающаяся terminal (по умолчанию transport)"""
+
+    def __init__(self, client, stages=STAGES, terminal=transport):
+        self.client = client
+        self.stages = tuple(stages)
+        handler = functools.partial(terminal, client)
+        for stage in reversed(self.stages):
+            handler = functools.partial(stage, client, proceed=handler)
+        self._handler = handler
+
+    def execute(self, call: ApiCall):
+        """Выполняет вызов, возвращает (статус, результат)"""
+        call.url = self.client.base_url + call.path
+        return self._handler(call)
+
+
+def overhead(calls: int = 2000, seed_pets: int = 10) -> dict:
+    """Среднее время вызова (мкс) get_list_of_pets через конвейер и прежним телом метода
+    (requests.get без сессии, append_to_file с открытием файла на каждую запись, res.json())
+    на локальном фейковом сервере"""
+    import requests
+
+    from api import PetFriends
+    from fake_server import FakePetFriendsServer
+
+    def append_to_file(filename: str, content: str) -> None:
+        # прежняя запись в лог, до фонового log_writer
+        with open(filename, 'a') as file:
+            file.write(content)
+
+    def direct(pf, auth_key):
+        # прежний get_list_of_pets вместе с декоратором log_api, который дописывал ответ
+        headers = {'auth_key': auth_key['key']}
+        params = {'filter': ''}
+        url = pf.base_url + 'api/pets'
+        res = requests.get(url, headers=headers, params=params)
+        append_to_file(log_writer.config.filename,
+                       f'\n--- Request ---\nURL: {url}, \nHeaders: {headers}, \nParams: {params}')
+        try:
+            result = res.json()
+        except ValueError:
+            result = res.text
+        append_to_file(log_writer.config.filename,
+                       f'\n--- Response ---\nStatus: {res.status_code}\nResponse: {result}\n')
+        return res.status_code, result
+
+    def measure(func) -> float:
+        for _ in range(min(calls, 50)):
+            func()
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        return (time.perf_counter() - started) / calls * 1e6
+
+    with FakePetFriendsServer({'bench@example.com': 'bench'}, seed_pets=seed_pets) as server, \
+            PetFriends(base_url=server.url) as pf:
+        _, auth_key = pf.get_api_key('bench@example.com', 'bench')
+        direct_us = measure(lambda: direct(pf, auth_key))
+        pipeline_us = measure(lambda: pf.get_list_of_pets(auth_key))
+    return {'direct_us': direct_us, 'pipeline_us': pipeline_us, 'overhead_us': pipeline_us - direct_us}
+
+
+def main(argv=None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Накладные расходы конвейера запросов PetFriends')
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--seed-pets', type=int, default=10)
+    args = parser.parse_args(argv)
+    result = overhead(args.calls, args.seed_pets)
+    print(f"old body {result['direct_us']:9.1f} us/call")
+    print(f"pipeline {result['pipeline_us']:9.1f} us/call")
+    print(f"overhead {result['overhead_us']:9.1f} us/call")
+
+
+if __name__ == '__main__':
+    main()
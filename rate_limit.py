@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from file_lock import atomic_write, locked
+
+# Ограничение частоты запросов на стороне клиента (token bucket) с лимитами по эндпоинтам.
+# Подключается к PetFriends через rate_limiter=..., действует на уровне адаптера сессии,
+# поэтому каждый повтор запроса тоже расходует токен.
+
+
+class RateLimiter:
+    """Token bucket по эндпоинтам.
+
+    limits - {префикс пути: rate} или {префикс пути: (rate, burst)}: rate - запросов в секунду,
+    burst - сколько запросов можно сделать подряд без ожидания (по умолчанию max(rate, 1)).
+    Префикс сравнивается с путем запроса без ведущего '/', побеждает самый длинный:
+    {'api/key': (0.5, 2), 'api/pets': 20}. default - лимит для путей, которых нет в limits
+    (None - такие запросы не ограничиваются).
+
+    Если указан path, состояние ведер хранится в JSON файле под файловой блокировкой, и лимит
+    общий для всех потоков, процессов и воркеров pytest-xdist, которые используют этот файл.
+
+    Запрос резервирует токен сразу (ведро может уйти в минус) и ждет, пока его очередь наступит, -
+    так ожидающие обслуживаются по порядку и состояние меняется один раз на запрос"""
+
+    def __init__(self, limits: dict = None, default=None, path: str = None):
+        self.limits = sorted(((prefix.strip('/'), _bucket(limit)) for prefix, limit in (limits or {}).items()),
+                             key=lambda item: len(item[0]), reverse=True)
+        self.default = _bucket(default) if default is not None else None
+        self.path = path
+        self._buckets = {}  # эндпоинт -> [токены, момент обновления]
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.delayed = 0
+        self.waited = 0.0
+
+    def endpoint(self, url: str):
+        """(префикс, rate, burst) для url или None, если запрос не ограничивается"""
+        path = urlsplit(url).path.strip('/')
+        for prefix, (rate, burst) in self.limits:
+            if path == prefix or path.startswith(prefix + '/'):
+                return prefix, rate, burst
+        if self.default is not None:
+            return '*', self.default[0], self.default[1]
+        return None
+
+    def acquire(self, url: str) -> float:
+        """Ждет своей очереди на запрос к url, возвращает время ожидания в секундах"""
+        limit = self.endpoint(url)
+        if limit is None:
+            return 0.0
+        name, rate, burst = limit
+        if self.path:
+            with locked(self.path + '.lock'):
+                buckets = self._read()
+                delay = _reserve(buckets, name, rate, burst, time.time())
+                self._write(buckets)
+        else:
+            with self._lock:
+                delay = _reserve(self._buckets, name, rate, burst, time.monotonic())
+        with self._lock:
+            self.acquired += 1
+            if delay > 0:
+                self.delayed += 1
+                self.waited += delay
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        return {'acquired': self.acquired, 'delayed': self.delayed, 'waited': self.waited}
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, buckets: dict) -> None:
+        atomic_write(self.path, json.dumps(buckets))
+
+
+def _bucket(limit) -> tuple:
+    if isinstance(limit, (tuple, list)):
+        rate, burst = limit
+    else:
+        rate, burst = limit, None
+    if rate <= 0:
+        raise ValueError(f'Rate must be positive, got {rate}')
+    return float(rate), float(burst if burst is not None else max(rate, 1))
+
+
+def _reserve(buckets: dict, name: str, rate: float, burst: float, now: float) -> float:
+    """Пополняет ведро name на момент now, забирает токен и возвращает, сколько ждать до него"""
+    tokens, updated = buckets.get(name, (burst, now))
+    tokens = min(burst, tokens + max(now - updated, 0.0) * rate) - 1
+    buckets[name] = [tokens, now]
+    return -tokens / rate if tokens < 0 else 0.0
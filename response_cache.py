@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Кэш ответов get_list_of_pets по (api ключ, фильтр). Подключается к PetFriends через response_cache=...
+# Свежий ответ отдается без запроса, устаревший перепроверяется условным запросом (If-None-Match /
+# If-Modified-Since), если сервер прислал ETag или Last-Modified. Методы, меняющие питомцев,
+# сбрасывают кэш своего ключа.
+
+
+class _Entry:
+    __slots__ = ('status', 'content', 'etag', 'last_modified', 'expires')
+
+    def __init__(self, status: int, content: bytes, etag: str, last_modified: str, expires: float):
+        self.status = status
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """LRU кэш ответов с временем жизни ttl (секунды) и не больше max_entries записей.
+
+    Хранится тело ответа в байтах, при каждом попадании оно разбирается заново - вызывающий код
+    может менять полученный словарь, не портя кэш. Устаревшая запись без ETag/Last-Modified
+    считается промахом"""
+
+    def __init__(self, ttl: float = 30, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (api ключ, фильтр) -> _Entry
+        self._generations = {}  # api ключ -> номер сброса, чтобы не сохранить ответ, начатый до записи
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes_saved = 0
+
+    def fetch(self, key: tuple, send):
+        """Возвращает (статус, тело в байтах, 'hit' | 'revalidated' | 'miss').
+        key - (api ключ, фильтр), send(headers) - выполняет запрос с дополнительными заголовками"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.expires > now:
+                    self.hits += 1
+                    self.bytes_saved += len(entry.content)
+                    return entry.status, entry.content, 'hit'
+            generation = self._generations.get(key[0], 0)
+
+        response = send(entry.validators() if entry is not None else {})
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                entry.expires = time.monotonic() + self.ttl
+                self.revalidated += 1
+                self.bytes_saved += len(entry.content)
+            return entry.status, entry.content, 'revalidated'
+
+        content = response.content
+        with self._lock:
+            self.misses += 1
+            if response.status_code == 200 and self._generations.get(key[0], 0) == generation:
+                self._entries[key] = _Entry(200, content, response.headers.get('ETag'),
+                                            response.headers.get('Last-Modified'), time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return response.status_code, content, 'miss'
+
+    def invalidate(self, api_key: str) -> None:
+        """Сбрасывает все ответы, полученные с api ключом api_key"""
+        with self._lock:
+            self._generations[api_key] = self._generations.get(api_key, 0) + 1
+            for key in [key for key in self._entries if key[0] == api_key]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for api_key in {key[0] for key in self._entries}:
+                self._generations[api_key] = self._generations.get(api_key, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.revalidated + self.misses
+            return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                    'evictions': self.evictions, 'invalidations': self.invalidations,
+                    'bytes_saved': self.bytes_saved, 'entries': len(self._entries),
+                    'hit_ratio': (self.hits + self.revalidated) / total if total else 0.0}
@@ -0,0 +1,132 @@
+import email.utils
+import random
+import threading
+import time
+
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+from urllib3.exceptions import NewConnectionError
+
+# Повторы запросов с экспоненциальной задержкой и предохранитель (circuit breaker).
+# Подключаются к PetFriends через retry_policy=... и circuit_breaker=..., работают на уровне адаптера
+# сессии, поэтому одинаково действуют для всех методов клиента.
+
+
+class CircuitOpenError(ConnectionError):
+    """Предохранитель разомкнут: сервер недавно много раз подряд отвечал ошибками, запрос не отправлялся"""
+
+
+class RetryPolicy:
+    """Политика повторов.
+
+    Повторяются ответы со статусами retry_statuses и сетевые ошибки. Методы не из idempotent_methods
+    (POST в add_new_pet и т.п.) повторяются, только если запрос гарантированно не дошел до сервера -
+    не удалось установить соединение. Задержка: backoff_factor * 2^попытка, не больше max_backoff,
+    с полным джиттером (случайное значение от 0 до задержки). Заголовок Retry-After имеет приоритет,
+    но не больше max_retry_after секунд"""
+
+    def __init__(self, max_retries: int = 3, backoff_factor: float = 0.2, max_backoff: float = 10.0,
+                 jitter: bool = True, retry_statuses=(429, 500, 502, 503, 504),
+                 idempotent_methods=('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'), respect_retry_after: bool = True,
+                 max_retry_after: float = 60.0):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(method.upper() for method in idempotent_methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, method: str, attempt: int, status: int = None, error: Exception = None,
+                     replayable: bool = True) -> bool:
+        """Нужен ли повтор после попытки номер attempt (с нуля).
+        replayable=False - тело запроса (поток) нельзя отправить повторно"""
+        if attempt >= self.max_retries:
+            return False
+        if error is not None:
+            if not isinstance(error, (ConnectionError, Timeout)) or isinstance(error, CircuitOpenError):
+                return False
+            if _not_connected(error):
+                return True
+            return method.upper() in self.idempotent_methods and replayable
+        return status in self.retry_statuses and method.upper() in self.idempotent_methods and replayable
+
+    def backoff(self, attempt: int, response=None) -> float:
+        """Сколько секунд ждать перед следующей попыткой"""
+        if self.respect_retry_after and response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        delay = min(self.backoff_factor * 2 ** attempt, self.max_backoff)
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def _not_connected(error: Exception) -> bool:
+    # соединение не установлено - запрос точно не ушел на сервер, повтор безопасен для любого метода
+    if isinstance(error, ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, NewConnectionError)
+
+
+def parse_retry_after(value):
+    """Retry-After в секундах или в формате HTTP даты -> секунды (None, если заголовка нет или он кривой)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(moment.timestamp() - time.time(), 0.0)
+
+
+class CircuitBreaker:
+    """Предохранитель: после failure_threshold ошибок подряд (5xx или сетевые) размыкается и reset_timeout
+    секунд сразу отклоняет запросы с CircuitOpenError. Затем пропускает один пробный запрос:
+    успех замыкает цепь, ошибка снова размыкает"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
@@ -1,8 +1,22 @@
 import os
 
-from dotenv import load_dotenv
+# Учетные данные (valid_email, valid_password) читаются из .env при первом обращении, а не при импорте:
+# dotenv грузится только теми процессами, которым настройки действительно нужны
 
-load_dotenv()
+_loaded = False
 
-valid_email = os.getenv('valid_email')
-valid_password = os.getenv('valid_password')
\ No newline at end of file
+
+def load() -> None:
+    """Загружает .env в переменные окружения (один раз)"""
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
+
+
+def __getattr__(name):
+    if name in ('valid_email', 'valid_password'):
+        load()
+        return os.getenv(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,96 @@
+import threading
+
+# Объединение одинаковых одновременных запросов (single-flight): пока запрос с ключом key выполняется,
+# остальные вызовы с тем же ключом не идут в сеть, а ждут и получают его результат.
+# В PetFriends и AsyncPetFriends включается параметром single_flight=True и действует на чтение
+# (get_api_key, get_list_of_pets). Общим получается только ответ сервера - разбирает его каждый
+# вызывающий сам, поэтому изменение результата одним вызовом не видно другим.
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Single-flight для потоков"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """Выполняет func() или, если такой же вызов уже идет, ждет его результат (или исключение).
+        Возвращает (результат, shared) - shared=True, если результат получен от чужого вызова"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = func()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """Single-flight для asyncio (в пределах одного event loop)"""
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        """Выполняет await func() или ждет результат такого же выполняющегося вызова.
+        Возвращает (результат, shared)"""
+        import asyncio  # уже загружен работающим event loop; на уровне модуля стоил бы импорта api
+
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # shield - отмена одного из ждущих не отменяет общий запрос
+            return await asyncio.shield(future), True
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.executed += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # ждущих может не быть - не даем asyncio ругаться на непрочитанную ошибку
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
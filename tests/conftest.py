@@ -0,0 +1,149 @@
+import contextlib
+import os
+import uuid
+
+import pytest
+
+from api import PetFriends
+from async_api import AsyncPetFriends
+from cassette import Cassette
+from fake_server import FakePetFriendsServer
+from key_cache import ApiKeyCache
+from settings import valid_email, valid_password
+
+# Параллельный запуск: pytest -n auto (нужен pytest-xdist). Session фикстуры создаются в каждом воркере
+# отдельно - у воркера свой фейковый сервер, клиент и ключ. Питомцы, которые создают фикстуры,
+# получают имя с префиксом воркера, и при уборке воркер удаляет только своих.
+
+
+def pytest_addoption(parser):
+    parser.addoption('--live', action='store_true', default=False,
+                     help='гонять тесты на настоящем сервере PetFriends вместо локального фейкового')
+    parser.addoption('--cassette', default=None,
+                     help='кассета для клиентов с адресом по умолчанию: без --record ответы берутся из нее без сети')
+    parser.addoption('--record', action='store_true', default=False,
+                     help='записать трафик в --cassette (обычно вместе с --live), а не воспроизводить')
+    parser.addoption('--corpus', default=None,
+                     help='JSONL корпус случаев для test_pet_corpus.py (по умолчанию tests/data/pet_cases.jsonl)')
+    parser.addoption('--corpus-limit', type=int, default=None,
+                     help='сколько случаев корпуса гонять (по умолчанию все, с --live - первые 50)')
+
+
+def pytest_configure(config):
+    # кассета ставится до импорта модулей тестов, чтобы ее получили и клиенты уровня модуля
+    path = config.getoption('--cassette')
+    if path:
+        PetFriends.cassette = Cassette(path, 'record' if config.getoption('--record') else 'replay')
+
+
+def pytest_unconfigure(config):
+    if PetFriends.cassette is not None:
+        PetFriends.cassette.save()
+        PetFriends.cassette = None
+
+
+@pytest.fixture(scope='session')
+def fake_server(request):
+    """Локальный фейковый сервер PetFriends на свободном порту (None при запуске с --live)"""
+    if request.config.getoption('--live'):
+        yield None
+        return
+    with FakePetFriendsServer({valid_email: valid_password}) as server:
+        yield server
+
+
+@pytest.fixture()
+def local_server(fake_server):
+    """Общий фейковый сервер для тестов, которые без него не имеют смысла (с --live тест пропускается).
+    Ошибки, внедренные тестом через state.fail_next, после теста сбрасываются"""
+    if fake_server is None:
+        pytest.skip('тест проверяет клиент на локальном фейковом сервере')
+    yield fake_server
+    fake_server.state.faults.clear()
+
+
+@pytest.fixture()
+def private_server():
+    """Фабрика отдельных фейковых серверов со своим состоянием - для тестов, которым мешают питомцы
+    других тестов на общем сервере: private_server(seed_pets=0). Серверы останавливаются после теста"""
+    with contextlib.ExitStack() as stack:
+        yield lambda **options: stack.enter_context(FakePetFriendsServer({valid_email: valid_password}, **options))
+
+
+@pytest.fixture()
+def fake_client(request):
+    """Фабрика клиентов PetFriends на фейковом сервере: fake_client(**опции клиента) - на общем
+    (с --live тест пропускается), fake_client(server, **опции) - на отдельном из private_server.
+    Клиенты закрываются после теста"""
+    with contextlib.ExitStack() as stack:
+        def connect(server=None, **options):
+            if server is None:
+                server = request.getfixturevalue('local_server')
+            return stack.enter_context(PetFriends(base_url=server.url, **options))
+
+        yield connect
+
+
+@pytest.fixture(scope='session', autouse=True)
+def petfriends_base_url(fake_server):
+    """Подменяет адрес сервера для всех клиентов, в том числе созданных при импорте модулей тестов"""
+    if fake_server is None:
+        yield PetFriends.base_url
+        return
+    live_url = PetFriends.base_url
+    PetFriends.base_url = AsyncPetFriends.base_url = fake_server.url
+    yield fake_server.url
+    PetFriends.base_url = AsyncPetFriends.base_url = live_url
+
+
+@pytest.fixture(scope='session')
+def worker_id():
+    """Имя воркера pytest-xdist ('gw0', 'gw1', ...) или 'master' при обычном запуске"""
+    return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+
+@pytest.fixture(scope='session')
+def key_cache(request, tmp_path_factory):
+    """Кэш api ключей. С --live он общий для всех воркеров (файл в общем каталоге запуска),
+    у фейковых серверов воркеров ключи свои, поэтому кэш - в памяти воркера"""
+    path = None
+    if request.config.getoption('--live'):
+        root = tmp_path_factory.getbasetemp()
+        if 'PYTEST_XDIST_WORKER' in os.environ:
+            root = root.parent  # общий для воркеров каталог над popen-gwN
+        path = str(root / 'api_keys.json')
+    return ApiKeyCache(ttl=300, path=path)
+
+
+@pytest.fixture(scope='session')
+def api_client(petfriends_base_url, key_cache):
+    """Клиент воркера с общим пулом соединений"""
+    with PetFriends(key_cache=key_cache) as pf:
+        yield pf
+
+
+@pytest.fixture(scope='session')
+def auth_key(api_client):
+    status, key = api_client.get_api_key(valid_email, valid_password)
+    assert status == 200
+    return key
+
+
+@pytest.fixture(scope='session')
+def pet_prefix(worker_id, api_client, auth_key):
+    """Префикс имен питомцев этого воркера в этом запуске. В конце сессии воркер удаляет
+    созданных им питомцев и оставшихся со своим префиксом - чужих (других воркеров и запусков) уборка не трогает"""
+    # с кассетой запросы должны совпадать между записью и воспроизведением - префикс без случайной части
+    prefix = f'pf-{worker_id}-' if PetFriends.cassette is not None else f'pf-{worker_id}-{uuid.uuid4().hex[:6]}-'
+    yield prefix
+    api_client.cleanup()
+    api_client.sweep(auth_key, prefix=prefix)
+
+
+@pytest.fixture()
+def own_pet(api_client, auth_key, pet_prefix):
+    """Питомец, созданный только для этого теста, - тесты не делят между собой my_pets[0]"""
+    status, pet = api_client.add_new_pet_without_photo(auth_key, pet_prefix + 'pet', 'cat', '1')
+    assert status == 200
+    yield pet
+    api_client.delete_pet(auth_key, pet['id'])
@@ -0,0 +1,159 @@
+import asyncio
+import contextlib
+import os
+
+import pytest
+
+from settings import valid_email, valid_password
+
+aiohttp = pytest.importorskip('aiohttp')
+
+photo = os.path.join(os.path.dirname(__file__), 'images', 'cat1.jpg')
+
+
+@pytest.fixture()
+def run(local_server):
+    """Запускает scenario(pf, auth_key) с асинхронным клиентом на фейковом сервере"""
+    from async_api import AsyncPetFriends
+
+    def run_scenario(scenario, **options):
+        async def main():
+            async with AsyncPetFriends(base_url=local_server.url, **options) as pf:
+                _, auth_key = await pf.get_api_key(valid_email, valid_password)
+                return await scenario(pf, auth_key)
+
+        return asyncio.run(main())
+
+    return run_scenario
+
+
+async def new_pet(pf, auth_key, name: str = 'Асинхрон') -> dict:
+    status, pet = await pf.add_new_pet_without_photo(auth_key, name, 'кот', '1')
+    assert status == 200
+    return pet
+
+
+def test_get_api_key(run):
+    async def scenario(pf, auth_key):
+        return auth_key, await pf.get_api_key(valid_email, 'wrong')
+
+    auth_key, (status, _) = run(scenario)
+    assert auth_key['key']
+    assert status == 403
+
+
+def test_get_list_of_pets(run):
+    """Проверяем список своих питомцев и коды ответов для неверного ключа и фильтра"""
+    async def scenario(pf, auth_key):
+        pet = await new_pet(pf, auth_key)
+        results = [await pf.get_list_of_pets(auth_key, 'my_pets'), await pf.get_list_of_pets({'key': 'wrong'}),
+                   await pf.get_list_of_pets(auth_key, 'wrong_filter')]
+        await pf.delete_pet(auth_key, pet['id'])
+        return pet, results
+
+    pet, [(status, my_pets), (wrong_key, _), (wrong_filter, _)] = run(scenario)
+    assert status == 200
+    assert pet['id'] in [p['id'] for p in my_pets['pets']]
+    assert (wrong_key, wrong_filter) == (403, 500)
+
+
+def test_add_new_pet(run):
+    async def scenario(pf, auth_key):
+        status, pet = await pf.add_new_pet(auth_key, 'Фото', 'кот', '2', photo)
+        await pf.delete_pet(auth_key, pet['id'])
+        return status, pet
+
+    status, pet = run(scenario)
+    assert status == 200
+    assert (pet['name'], pet['animal_type'], pet['age']) == ('Фото', 'кот', '2')
+    assert pet['pet_photo'].startswith('data:image/jpeg;base64,')
+
+
+def test_add_new_pet_without_photo(run):
+    async def scenario(pf, auth_key):
+        pet = await new_pet(pf, auth_key, 'Без фото')
+        await pf.delete_pet(auth_key, pet['id'])
+        return pet
+
+    pet = run(scenario)
+    assert (pet['name'], pet['pet_photo']) == ('Без фото', '')
+
+
+def test_add_pet_photo(run):
+    async def scenario(pf, auth_key):
+        pet = await new_pet(pf, auth_key)
+        result = await pf.add_pet_photo(auth_key, pet['id'], photo)
+        await pf.delete_pet(auth_key, pet['id'])
+        return result
+
+    status, pet = run(scenario)
+    assert status == 200
+    assert pet['pet_photo'].startswith('data:image/jpeg;base64,')
+
+
+def test_update_pet_info(run):
+    """Проверяем обновление питомца (возраст числом уходит строкой) и ответ для несуществующего id"""
+    async def scenario(pf, auth_key):
+        pet = await new_pet(pf, auth_key)
+        results = [await pf.update_pet_info(auth_key, pet['id'], 'Обновлен', 'пес', 3),
+                   await pf.update_pet_info(auth_key, 'no-such-id', 'a', 'b', '1')]
+        await pf.delete_pet(auth_key, pet['id'])
+        return results
+
+    (status, pet), (missing, _) = run(scenario)
+    assert status == 200
+    assert (pet['name'], pet['animal_type'], pet['age']) == ('Обновлен', 'пес', '3')
+    assert missing == 400
+
+
+def test_delete_pet(run):
+    async def scenario(pf, auth_key):
+        pet = await new_pet(pf, auth_key)
+        status, _ = await pf.delete_pet(auth_key, pet['id'])
+        _, my_pets = await pf.get_list_of_pets(auth_key, 'my_pets')
+        return status, pet, my_pets
+
+    status, pet, my_pets = run(scenario)
+    assert status == 200
+    assert pet['id'] not in [p['id'] for p in my_pets['pets']]
+
+
+def test_results_match_sync_client(run, fake_client):
+    """Проверяем что асинхронный клиент возвращает те же кортежи (status, result), что и PetFriends"""
+    pf = fake_client()
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    expected = [pf.get_list_of_pets({'key': 'wrong'}), pf.get_list_of_pets(auth_key, 'wrong_filter'),
+                pf.update_pet_info(auth_key, 'no-such-id', 'a', 'b', '1')]
+
+    async def scenario(apf, auth_key):
+        return [await apf.get_list_of_pets({'key': 'wrong'}), await apf.get_list_of_pets(auth_key, 'wrong_filter'),
+                await apf.update_pet_info(auth_key, 'no-such-id', 'a', 'b', '1')]
+
+    assert run(scenario) == expected
+
+
+def test_concurrency_is_capped_by_semaphore(run, monkeypatch):
+    """Проверяем что одновременно в работе не больше max_concurrency запросов"""
+    active, peak = 0, 0
+    request = aiohttp.ClientSession.request
+
+    @contextlib.asynccontextmanager
+    async def counting_request(session, *args, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.01)
+            async with request(session, *args, **kwargs) as res:
+                yield res
+        finally:
+            active -= 1
+
+    monkeypatch.setattr(aiohttp.ClientSession, 'request', counting_request)
+
+    async def scenario(pf, auth_key):
+        results = await asyncio.gather(*[pf.get_list_of_pets(auth_key, 'my_pets') for _ in range(10)])
+        return [status for status, _ in results]
+
+    assert run(scenario, max_concurrency=3) == [200] * 10
+    assert peak == 3
@@ -0,0 +1,34 @@
+import time
+
+from bench import LoadRunner, compare, parse_mix, percentile
+from settings import valid_email, valid_password
+
+
+def test_percentile():
+    """Проверяем расчет перцентилей методом ближайшего ранга"""
+    values = [i / 100 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 99) == 0.99
+    assert percentile([], 95) == 0.0
+
+
+def test_short_run_reports_every_operation(fake_client):
+    """Проверяем короткий прогон смеси операций на фейковом сервере, уборку питомцев 'bench' и поиск регрессий"""
+    pf = fake_client()
+    runner = LoadRunner(pf, valid_email, valid_password,
+                        parse_mix('key=1,list=1,add_simple=1,update=1,delete=1'), concurrency=2)
+    before = time.time()
+    report = runner.run(duration=0.5, warmup=0.1)
+    assert before <= report['started_at'] <= time.time() - 0.6
+    _, my_pets = pf.get_list_of_pets(runner.auth_key, 'my_pets')
+    assert not [pet for pet in my_pets['pets'] if pet['name'].startswith('bench')]
+    assert report['cleanup']['failed'] == 0 and len(pf.created) == 0
+
+    assert set(report['endpoints']) <= {'key', 'list', 'add_simple', 'update', 'delete'}
+    assert report['total']['count'] > 0
+    assert report['total']['errors'] == 0
+
+    slower = {'endpoints': {name: dict(stats, p95_ms=stats['p95_ms'] * 10 + 1)
+                            for name, stats in report['endpoints'].items()}}
+    assert compare(report, report, 0.2) == []
+    assert compare(slower, report, 0.2)
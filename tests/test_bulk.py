@@ -0,0 +1,42 @@
+import threading
+import time
+
+from bulk import BatchResult
+
+
+def test_failed_items_do_not_abort_batch():
+    """Проверяем что упавший или неуспешный элемент не останавливает остальную пачку"""
+    def call(n):
+        if n == 3:
+            raise ConnectionError('reset')
+        return (200 if n % 2 == 0 else 403), {'n': n}
+
+    batch = BatchResult(call, range(10), max_workers=4).wait()
+    stats = batch.stats()
+
+    assert stats['total'] == 10
+    assert stats['succeeded'] == 5
+    assert stats['failed'] == 5
+    assert stats['throughput'] > 0
+    failed = [item for item in batch.items if item.index == 3][0]
+    assert isinstance(failed.error, ConnectionError)
+
+
+def test_results_stream_as_they_complete():
+    """Проверяем что результаты приходят по мере готовности, а число одновременных вызовов ограничено"""
+    lock = threading.Lock()
+    running = [0, 0]  # сейчас, максимум
+
+    def call(delay):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(delay)
+        with lock:
+            running[0] -= 1
+        return 200, delay
+
+    order = [item.result for item in BatchResult(call, [0.2, 0.01, 0.01, 0.01], max_workers=2)]
+
+    assert order[-1] == 0.2
+    assert running[1] <= 2
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from api import PetFriends
+from cassette import Cassette, CassetteMiss
+from settings import valid_email, valid_password
+
+photo = os.path.join(os.path.dirname(__file__), 'images', 'cat1.jpg')
+
+
+def scenario(pf) -> list:
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    results = [pf.get_list_of_pets(auth_key, 'my_pets')]
+    for n in range(3):
+        status, pet = pf.add_new_pet(auth_key, 'Кассета', 'кот', '1', photo)
+        results.append((status, pet))
+        results.append(pf.delete_pet(auth_key, pet['id']))
+    results.append(pf.get_list_of_pets(auth_key, 'my_pets'))
+    results.append(list(pf.iter_pets(auth_key, 'my_pets')))
+    return results
+
+
+def test_record_and_replay(private_server, fake_client, tmp_path):
+    """Проверяем что записанный сценарий воспроизводится без сервера с теми же ответами,
+    а тела запросов при воспроизведении не копятся в памяти"""
+    path = str(tmp_path / 'petfriends.json.gz')
+    with Cassette(path, 'record') as cassette:
+        recorded = scenario(fake_client(private_server(), cassette=cassette))
+    assert cassette.stats()['recorded'] == 10
+    if hasattr(os, 'getuid'):
+        assert os.stat(path).st_mode & 0o777 == 0o600  # в кассете ключ api/key
+
+    replay = Cassette(path)
+    bodies = replay.stats()['bodies']
+    with PetFriends(base_url='http://127.0.0.1:9/', cassette=replay) as pf:
+        assert scenario(pf) == recorded
+        with pytest.raises(CassetteMiss):
+            pf.get_list_of_pets({'key': 'unknown'})
+    assert replay.stats()['played'] == 10
+    assert replay.stats()['bodies'] == bodies
+    assert pf.connection_stats()['requests'] == 0
+
+
+def test_photo_bodies_are_stored_once(private_server, fake_client, tmp_path):
+    """Проверяем что три загрузки одного фото дают один ключ (граница multipart нормализуется)
+    и одно тело в кассете"""
+    path = str(tmp_path / 'petfriends.json')
+    with Cassette(path, 'record') as cassette:
+        pf = fake_client(private_server(), cassette=cassette)
+        _, auth_key = pf.get_api_key(valid_email, valid_password)
+        for _ in range(3):
+            pf.add_new_pet(auth_key, 'Фото', 'кот', '1', photo)
+    upload_keys = [key for key, responses in cassette._interactions.items() if responses[0]['method'] == 'POST']
+    assert len(upload_keys) == 1
+    assert len(cassette._interactions[upload_keys[0]]) == 3
+    request_bodies = {recorded['request_body'] for recorded in cassette._interactions[upload_keys[0]]}
+    assert len(request_bodies) == 1
+
+
+def test_auto_mode_records_misses(private_server, fake_client, tmp_path):
+    path = str(tmp_path / 'petfriends.json')
+    with Cassette(path, 'auto') as cassette:
+        pf = fake_client(private_server(), cassette=cassette)
+        pf.get_api_key(valid_email, valid_password)
+        pf.get_api_key(valid_email, valid_password)
+    assert (cassette.stats()['recorded'], cassette.stats()['played']) == (1, 1)
+    assert len(Cassette(path)) == 1
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from settings import valid_email, valid_password
+
+
+def hold_connection(response, *args, **kwargs):
+    # хук срабатывает до чтения тела ответа, поэтому соединение остается занятым на время паузы
+    time.sleep(0.05)
+
+
+def concurrent_keys(pf, threads: int) -> list:
+    barrier = threading.Barrier(threads)
+    statuses = []
+
+    def get_key():
+        barrier.wait()
+        statuses.append(pf.get_api_key(valid_email, valid_password)[0])
+
+    workers = [threading.Thread(target=get_key) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return statuses
+
+
+def test_sequential_calls_reuse_one_connection(fake_client):
+    """Проверяем что пул создается при первом запросе, а последовательные вызовы идут по одному соединению"""
+    pf = fake_client()
+    assert pf.connection_stats() == {'opened': 0, 'reused': 0, 'requests': 0}
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    for _ in range(4):
+        pf.get_list_of_pets(auth_key, 'my_pets')
+    assert pf.connection_stats() == {'opened': 1, 'reused': 4, 'requests': 5}
+
+
+def test_without_keep_alive_every_call_opens_connection(fake_client):
+    pf = fake_client(keep_alive=False)
+    for _ in range(3):
+        assert pf.get_api_key(valid_email, valid_password)[0] == 200
+    assert pf.connection_stats() == {'opened': 3, 'reused': 0, 'requests': 3}
+
+
+@pytest.mark.parametrize('pool_block', [True, False])
+def test_pool_maxsize_limits_connections_per_host(fake_client, pool_block):
+    """Проверяем лимит pool_maxsize: с pool_block лишние потоки ждут свободное соединение,
+    без него открывают временные соединения сверх лимита"""
+    pf = fake_client(pool_maxsize=2, pool_block=pool_block)
+    pf.session.hooks['response'].append(hold_connection)
+    assert concurrent_keys(pf, 6) == [200] * 6
+    stats = pf.connection_stats()
+    assert stats['requests'] == 6
+    assert stats['opened'] == 2 if pool_block else stats['opened'] > 2
+
+
+def test_evicted_and_closed_pools_keep_their_counters(local_server, fake_client):
+    """Проверяем что при pool_connections=1 пул другого хоста вытесняет прежний, а счетчики вытесненных
+    и закрытых пулов не теряются"""
+    pf = fake_client(pool_connections=1)
+    other_host = local_server.url.replace('127.0.0.1', 'localhost')
+    for url in (local_server.url, other_host, local_server.url):
+        assert pf.session.get(url + 'api/key', headers={'email': valid_email, 'password': valid_password}).ok
+    assert pf.connection_stats() == {'opened': 3, 'reused': 0, 'requests': 3}
+    assert len(pf.adapter.poolmanager.pools) == 1
+    pf.close()
+    assert pf.connection_stats()['requests'] == 3
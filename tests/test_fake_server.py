@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+from settings import valid_email, valid_password
+
+photo = os.path.join(os.path.dirname(__file__), 'images', 'cat1.jpg')
+
+
+@pytest.fixture()
+def client(fake_client):
+    pf = fake_client()
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    return pf, auth_key
+
+
+def test_pet_lifecycle(client):
+    """Проверяем полный цикл питомца на фейковом сервере: создание, фото, обновление, удаление"""
+    pf, auth_key = client
+    status, pet = pf.add_new_pet_without_photo(auth_key, 'Тузик', 'пес', '2')
+    assert status == 200
+    assert pet['pet_photo'] == ''
+
+    status, pet = pf.add_pet_photo(auth_key, pet['id'], photo)
+    assert status == 200
+    assert pet['pet_photo'].startswith('data:image/jpeg;base64,')
+
+    status, pet = pf.update_pet_info(auth_key, pet['id'], 'Шарик', 'пес', 3)
+    assert status == 200
+    assert (pet['name'], pet['age']) == ('Шарик', '3')
+
+    status, _ = pf.delete_pet(auth_key, pet['id'])
+    _, my_pets = pf.get_list_of_pets(auth_key, 'my_pets')
+    assert status == 200
+    assert pet['id'] not in [p['id'] for p in my_pets['pets']]
+
+
+def test_status_codes(client):
+    """Проверяем коды ответов для неверного ключа, чужого питомца и неверного фильтра"""
+    pf, auth_key = client
+    assert pf.get_api_key(valid_email, 'wrong')[0] == 403
+    assert pf.get_list_of_pets({'key': 'wrong'})[0] == 403
+    assert pf.get_list_of_pets(auth_key, 'wrong_filter')[0] == 500
+    assert pf.update_pet_info(auth_key, 'no-such-id', 'a', 'b', '1')[0] == 400
+
+
+def test_connections_are_reused(client):
+    """Проверяем что клиент ходит на сервер по одному keep-alive соединению"""
+    pf, auth_key = client
+    for _ in range(5):
+        pf.get_list_of_pets(auth_key, 'my_pets')
+    stats = pf.connection_stats()
+    assert stats['opened'] == 1
+    assert stats['reused'] == stats['requests'] - 1
+
+
+def test_async_client(local_server):
+    """Проверяем асинхронный клиент: параллельные запросы и те же кортежи (status, result)"""
+    pytest.importorskip('aiohttp')
+    from async_api import AsyncPetFriends
+
+    async def scenario():
+        async with AsyncPetFriends(base_url=local_server.url, max_concurrency=4) as pf:
+            _, auth_key = await pf.get_api_key(valid_email, valid_password)
+            added = await asyncio.gather(*[pf.add_new_pet(auth_key, f'Кот {n}', 'кот', n, photo)
+                                           for n in range(10)])
+            deleted = await asyncio.gather(*[pf.delete_pet(auth_key, pet['id']) for _, pet in added])
+            return added, deleted
+
+    added, deleted = asyncio.run(scenario())
+    assert [status for status, _ in added] == [200] * 10
+    assert [status for status, _ in deleted] == [200] * 10
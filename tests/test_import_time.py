@@ -0,0 +1,31 @@
+import os
+
+import import_time
+from api import PetFriends
+
+
+def test_api_import_defers_heavy_modules():
+    """Проверяем что импорт api не тянет requests, dotenv и прочие тяжелые модули"""
+    assert import_time.measure('api', runs=1)['deferred_loaded'] == []
+
+
+def test_api_import_fits_budget():
+    """Проверяем что импорт api укладывается в бюджет времени. Замер зависит от загрузки машины, поэтому
+    по умолчанию бюджет берется с запасом SLACK, точный - с PETFRIENDS_IMPORT_BUDGET=1 на ненагруженной машине"""
+    budget = import_time.IMPORT_BUDGET_MS
+    if not os.environ.get('PETFRIENDS_IMPORT_BUDGET'):
+        budget *= import_time.SLACK
+    assert import_time.measure('api', runs=5)['import_ms'] < budget
+
+
+def test_settings_are_loaded_on_first_access():
+    assert import_time.measure('settings', runs=1)['deferred_loaded'] == []
+
+
+def test_client_opens_session_on_first_request(fake_server):
+    """Проверяем что создание клиента не создает сессию, а первый запрос создает"""
+    with PetFriends(base_url=fake_server.url if fake_server else None) as pf:
+        assert pf.adapter is None
+        assert pf.connection_stats() == {'opened': 0, 'reused': 0, 'requests': 0}
+        pf.get_api_key('nobody@example.com', 'wrong')
+        assert pf.adapter is not None
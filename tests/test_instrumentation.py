@@ -0,0 +1,69 @@
+import socket
+
+import pytest
+
+from api import PetFriends
+from instrumentation import LatencyHistograms
+from settings import valid_email, valid_password
+
+
+@pytest.fixture()
+def pf(fake_client):
+    return fake_client()
+
+
+def test_hooks_receive_timings_and_sizes(pf):
+    """Проверяем что post хук получает время соединения только для первого вызова, TTFB и размеры"""
+    calls = []
+    started = []
+    handle = pf.add_hook(pre=lambda call: started.append(call.method), post=calls.append)
+
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    pf.get_list_of_pets(auth_key, 'my_pets')
+    pf.remove_hook(handle)
+    pf.get_list_of_pets(auth_key, 'my_pets')
+
+    assert started == ['get_api_key', 'get_list_of_pets']
+    first, second = calls
+    assert (first.method, first.http_method, first.status) == ('get_api_key', 'GET', 200)
+    assert first.connect > 0 and first.dns > 0
+    assert second.connect == 0
+    assert 0 < second.ttfb <= second.total
+    assert second.response_bytes > 0
+    assert second.url.endswith('api/pets?filter=my_pets')
+
+
+def test_histograms_aggregate_per_method(pf):
+    """Проверяем агрегацию замеров в гистограммы по методам клиента"""
+    histograms = LatencyHistograms()
+    pf.add_hook(post=histograms)
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    for _ in range(5):
+        pf.get_list_of_pets(auth_key, 'my_pets')
+    pf.get_list_of_pets({'key': 'wrong'})
+
+    summary = histograms.summary()
+    assert summary['get_list_of_pets']['count'] == 6
+    assert summary['get_list_of_pets']['errors'] == 1
+    assert summary['get_api_key']['count'] == 1
+    assert 0 < summary['get_list_of_pets']['total_p50_ms'] <= summary['get_list_of_pets']['total_p99_ms']
+
+
+def test_connection_falls_back_to_next_resolved_address(local_server, monkeypatch):
+    """Проверяем что замер DNS не закрепляет первый адрес: если он недоступен, соединение идет на следующий"""
+    port = local_server._httpd.server_address[1]
+    getaddrinfo = socket.getaddrinfo
+
+    def resolve(host, *args, **kwargs):
+        if host == 'petfriends.test':
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port)) for address in ('127.0.0.2', '127.0.0.1')]
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, 'getaddrinfo', resolve)
+    calls = []
+    with PetFriends(base_url=f'http://petfriends.test:{port}/') as client:
+        client.session.trust_env = False
+        client.add_hook(post=calls.append)
+        status, _ = client.get_api_key(valid_email, valid_password)
+    assert status == 200
+    assert calls[0].dns > 0 and calls[0].connect > 0
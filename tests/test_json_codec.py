@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import json_codec
+
+
+@pytest.fixture
+def stdlib_backend():
+    previous = json_codec.backend
+    json_codec.set_backend('json')
+    yield
+    json_codec.set_backend(previous)
+
+
+@pytest.mark.parametrize('name', json_codec.available_backends())
+def test_every_backend_decodes_pets_body(name):
+    """Проверяем что каждый установленный парсер разбирает тело api/pets так же, как json"""
+    body = json_codec.sample_pets_body(50)
+    previous = json_codec.backend
+    json_codec.set_backend(name)
+    try:
+        assert json_codec.decode(body, 'application/json') == json.loads(body)
+    finally:
+        json_codec.set_backend(previous)
+
+
+def test_content_type_decides_parsing(stdlib_backend):
+    """Проверяем что HTML и текст не разбираются как JSON, а без Content-Type тело угадывается"""
+    assert json_codec.decode(b'{"key": "1"}', 'application/json; charset=utf-8') == {'key': '1'}
+    assert json_codec.decode(b'{"key": "1"}', 'text/html') == '{"key": "1"}'
+    assert json_codec.decode(b'  [1, 2]') == [1, 2]
+    assert json_codec.decode('<h1>Ошибка</h1>'.encode('utf-8')) == '<h1>Ошибка</h1>'
+    assert json_codec.decode(b'{broken', 'application/json') == '{broken'
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        json_codec.set_backend('simdjson_missing')
+
+
+def test_benchmark_reports_every_decoder():
+    """Проверяем что бенчмарк меряет все установленные парсеры и старый путь через текст"""
+    results = json_codec.benchmark(json_codec.sample_pets_body(20), repeat=2)
+    assert set(results) == set(json_codec.available_backends()) | {'text+json'}
+    assert all(ms >= 0 for ms in results.values())
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from json_stream import iter_array_items
+
+
+def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.parametrize('size', [1, 7, 4096])
+def test_items_are_parsed_incrementally(size):
+    """Проверяем что питомцы разбираются по одному при любом размере куска, включая разрыв utf-8 символа"""
+    pets = [{'id': str(i), 'name': f'Барсик {i}', 'age': i, 'tags': [1, 2.5, None]} for i in range(50)]
+    body = json.dumps({'pets': pets}, ensure_ascii=False).encode('utf-8')
+
+    assert list(iter_array_items(chunked(body, size), 'pets')) == pets
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 64])
+def test_strings_with_brackets_quotes_and_escapes(size):
+    """Проверяем что скобки, кавычки и экранирование внутри строк не сбивают поиск конца элемента на любых кусках"""
+    pets = [{'name': 'a"]}{[\\', 'photo': 'x' * 100 + '\\"' + 'y' * 50}, '}]"', 12345, -1.5e10, True, None, []]
+    body = json.dumps({'pets': pets, 'total': 7}).encode('utf-8')
+
+    assert list(iter_array_items(chunked(body, size), 'pets')) == pets
+
+
+def test_truncated_body_raises():
+    body = json.dumps({'pets': [{'id': '1'}, {'id': '2', 'photo': 'A' * 1000}]}).encode()
+    with pytest.raises(ValueError):
+        list(iter_array_items(chunked(body[:500], 64), 'pets'))
+
+
+def test_early_stop_does_not_read_whole_body():
+    """Проверяем что при остановке после первого питомца остальное тело не читается"""
+    body = json.dumps({'pets': [{'id': str(i)} for i in range(1000)]}).encode()
+    read = []
+
+    def chunks():
+        for chunk in chunked(body, 64):
+            read.append(chunk)
+            yield chunk
+
+    first = next(iter_array_items(chunks(), 'pets'))
+    assert first == {'id': '0'}
+    assert len(read) < 5
+
+
+def test_missing_key_raises():
+    """Проверяем что ответ без массива pets дает ошибку, а не пустой список"""
+    with pytest.raises(ValueError):
+        list(iter_array_items([b'Forbidden'], 'pets'))
+    assert list(iter_array_items([b'{"pets": []}'], 'pets')) == []
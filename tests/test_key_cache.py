@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+import stat
+import time
+
+from file_lock import atomic_write
+from key_cache import ApiKeyCache
+
+
+def test_key_is_cached_until_ttl():
+    """Проверяем что ключ берется из кэша до истечения ttl и считаются попадания и промахи"""
+    cache = ApiKeyCache(ttl=0.2)
+    assert cache.get('a@a.a', '123') is None
+    cache.put('a@a.a', '123', 'key1')
+    assert cache.get('a@a.a', '123') == 'key1'
+    assert cache.get('a@a.a', 'other') is None
+    time.sleep(0.25)
+    assert cache.get('a@a.a', '123') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 3
+
+
+def test_rejected_key_is_invalidated():
+    """Проверяем что ключ удаляется из кэша по значению ключа"""
+    cache = ApiKeyCache()
+    cache.put('a@a.a', '123', 'key1')
+    cache.invalidate_key('key1')
+    assert cache.get('a@a.a', '123') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def _put_from_other_process(path):
+    ApiKeyCache(path=path).put('a@a.a', '123', 'shared-key')
+
+
+def test_disk_cache_is_shared_between_processes(tmp_path):
+    """Проверяем что ключ, сохраненный в другом процессе, виден через общий файл"""
+    path = str(tmp_path / 'keys.json')
+    process = multiprocessing.Process(target=_put_from_other_process, args=(path,))
+    process.start()
+    process.join(10)
+
+    cache = ApiKeyCache(path=path)
+    assert cache.get('a@a.a', '123') == 'shared-key'
+    ApiKeyCache(path=path).invalidate('a@a.a', '123')
+    assert ApiKeyCache(path=path).get('a@a.a', '123') is None
+
+
+def test_key_file_is_written_atomically_and_private(tmp_path):
+    """Проверяем что файл кэша заменяется целиком, без временных файлов, и доступен только владельцу"""
+    path = str(tmp_path / 'keys.json')
+    atomic_write(path, 'старое')
+    ApiKeyCache(path=path).put('a@a.a', '123', 'key1')
+    assert ApiKeyCache(path=path).get('a@a.a', '123') == 'key1'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert sorted(os.listdir(tmp_path)) == ['keys.json', 'keys.json.lock']
@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+
+import log_writer
+from log_writer import BufferedLogWriter
+
+
+def test_records_are_written_in_batches(tmp_path):
+    """Проверяем что записи попадают в файл после flush и пишутся пачками"""
+    path = tmp_path / 'log.txt'
+    writer = BufferedLogWriter(str(path), batch_size=50, flush_interval=10)
+    for i in range(120):
+        assert writer.write(f'record {i}\n')
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    lines = path.read_text().splitlines()
+    assert lines == [f'record {i}' for i in range(120)]
+    assert writer.batches < 120
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """Проверяем что при переполненной очереди запись отбрасывается, а не блокирует вызывающего"""
+    release = threading.Event()
+    writer = BufferedLogWriter(str(tmp_path / 'log.txt'), max_queue=2, batch_size=1, high_watermark=1)
+    # фоновый поток "зависает" на записи первой пачки, очередь не разгребается
+    write_batch = writer._write_batch
+    writer._write_batch = lambda batch: (release.wait(5), write_batch(batch))
+    accepted = [writer.write('x\n') for _ in range(100)]
+    release.set()
+    writer.close()
+
+    assert accepted.count(False) > 0
+    assert writer.dropped == accepted.count(False)
+
+
+def test_request_and_response_are_one_record(tmp_path):
+    """Проверяем что части, записанные внутри record(), уходят в файл одной записью"""
+    path = str(tmp_path / 'log.txt')
+
+    def call(n):
+        with log_writer.record(path):
+            log_writer.append(path, f'request {n};')
+            log_writer.append(path, f'response {n}\n')
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log_writer.get_writer(path).flush(timeout=5)
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert sorted(lines) == sorted(f'request {n};response {n}' for n in range(20))
+
+
+def test_jsonl_record_and_rotation(tmp_path):
+    """Проверяем что в формате jsonl вызов пишется одной JSON строкой, а файл ротируется со сжатием"""
+    path = str(tmp_path / 'api.jsonl')
+    log_writer.configure(filename=path, fmt='jsonl', max_bytes=200, compress=True, backup_count=2,
+                         max_body_bytes=4)
+    try:
+        for n in range(10):
+            with log_writer.record():
+                log_writer.append(path, 'text is ignored in jsonl')
+                log_writer.note(method='GET', url=f'http://localhost/api/pets?n={n}', status=200,
+                                response_body=log_writer.truncate('0123456789'))
+            log_writer.get_writer(path).flush(timeout=5)
+    finally:
+        log_writer.configure()
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert records[-1]['url'].endswith('n=9')
+    assert records[-1]['response_body'].startswith('0123...')
+    assert {'ts', 'latency_ms', 'method', 'status'} <= records[-1].keys()
+    rotated = [name for name in os.listdir(tmp_path) if name.startswith('api.jsonl.')]
+    assert 0 < len(rotated) <= 2
+    assert all(name.endswith('.gz') for name in rotated)
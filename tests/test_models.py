@@ -0,0 +1,28 @@
+from models import Pet, PetList
+
+
+pets = [{'id': str(i), 'name': f'Барсик {i}', 'animal_type': 'кот', 'age': str(i), 'pet_photo': '',
+         'created_at': '1680000000.0', 'user_id': 'u1'} for i in range(5)]
+
+
+def test_pet_round_trip():
+    """Проверяем что запись питомца конвертируется в словарь ответа API и обратно без потерь"""
+    pet = Pet.from_dict(pets[0])
+    assert pet.to_dict() == pets[0]
+    assert Pet.from_dict(pet.to_dict()) == pet
+    assert not hasattr(pet, '__dict__')
+
+
+def test_pet_list_is_columnar():
+    """Проверяем что PetList хранит поля колонками и отдает питомцев, срезы и словари"""
+    pet_list = PetList(pets)
+
+    assert len(pet_list) == 5
+    assert pet_list[2] == Pet.from_dict(pets[2])
+    assert pet_list.column('name')[1] == 'Барсик 1'
+    assert pet_list[1:3].to_dicts() == pets[1:3]
+    assert [pet.id for pet in pet_list] == ['0', '1', '2', '3', '4']
+    assert '3' in pet_list
+    assert pet_list.find('4').name == 'Барсик 4'
+    assert pet_list.find('nope') is None
+    assert pet_list.to_dicts() == pets
@@ -0,0 +1,77 @@
+import asyncio
+import io
+import os
+import threading
+
+import pytest
+
+from multipart import MultipartEncoder, detect_mime
+
+images = os.path.join(os.path.dirname(__file__), 'images')
+
+
+@pytest.mark.parametrize('photo, mime', [('cat1.jpg', 'image/jpeg'), ('00013.png', 'image/png')])
+def test_mime_is_detected_from_content(photo, mime):
+    """Проверяем что MIME тип определяется по содержимому файла, а не задан жестко"""
+    with open(os.path.join(images, photo), 'rb') as f:
+        assert detect_mime(f.read(16)) == mime
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_body_length_matches_streamed_bytes(use_mmap):
+    """Проверяем что заявленная длина тела совпадает с реально отданными байтами и фото передается целиком"""
+    path = os.path.join(images, 'cat1.jpg')
+    with MultipartEncoder({'name': 'Барсик', 'age': 3}, {'pet_photo': path}, chunk_size=4096,
+                          use_mmap=use_mmap) as body:
+        data = body.to_bytes()
+
+    with open(path, 'rb') as f:
+        photo = f.read()
+    assert len(data) == len(body)
+    assert photo in data
+    assert b'filename="cat1.jpg"\r\nContent-Type: image/jpeg' in data
+    assert data.endswith(f'--{body.boundary}--\r\n'.encode())
+
+
+def test_opened_file_is_closed():
+    """Проверяем что файл, открытый кодировщиком, закрывается, а файл вызывающего - нет"""
+    path = os.path.join(images, 'cat1.jpg')
+    body = MultipartEncoder(files={'pet_photo': path})
+    part = body._files[0]
+    body.close()
+    assert part._owned is None
+
+    with open(path, 'rb') as f:
+        with MultipartEncoder(files={'pet_photo': f}) as body:
+            assert body.read(10)
+        assert not f.closed
+
+
+def test_bytes_source_without_name():
+    """Проверяем что фото из bytes получает имя файла по типу содержимого"""
+    with open(os.path.join(images, '00013.png'), 'rb') as f:
+        photo = f.read()
+    with MultipartEncoder(files={'pet_photo': photo}) as body:
+        assert b'filename="photo.png"' in body.to_bytes()
+
+
+def test_async_body_reads_file_off_the_event_loop():
+    """Проверяем что асинхронное тело (для aiohttp) читает файл не в потоке цикла событий"""
+    path = os.path.join(images, 'cat1.jpg')
+    threads = set()
+
+    class Photo(io.FileIO):
+        def read(self, size=-1):
+            threads.add(threading.get_ident())
+            return super().read(size)
+
+    async def collect(body):
+        return b''.join([chunk async for chunk in body]), threading.get_ident()
+
+    with Photo(path, 'rb') as f, MultipartEncoder(files={'pet_photo': f}, chunk_size=4096) as body:
+        threads.clear()  # начало файла кодировщик читает в конструкторе
+        data, loop_thread = asyncio.run(collect(body))
+    with open(path, 'rb') as f:
+        assert f.read() in data
+    assert len(data) == len(body)
+    assert threads and loop_thread not in threads
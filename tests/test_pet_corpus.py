@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+import corpus
+
+# Граничные данные для добавления питомцев берутся из корпуса (tests/data/pet_cases.jsonl, см. corpus.py),
+# а не пишутся тестом на каждый случай. Каждый случай - отдельный параметр теста, но запросы всех
+# случаев модуля выполняются разом, параллельно, при первом обращении к фикстуре corpus_results.
+#   pytest tests/test_pet_corpus.py --corpus my_cases.jsonl --corpus-limit 200
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'pet_cases.jsonl')
+LIVE_LIMIT = 50
+
+
+def pytest_generate_tests(metafunc):
+    if 'pet_case' not in metafunc.fixturenames:
+        return
+    config = metafunc.config
+    limit = config.getoption('--corpus-limit')
+    if limit is None and config.getoption('--live'):
+        limit = LIVE_LIMIT
+    cases = corpus.iter_cases(config.getoption('--corpus') or CORPUS, limit)
+    metafunc.parametrize('pet_case', [
+        pytest.param(case, id=case.id, marks=[pytest.mark.xfail(reason=case.xfail)] if case.xfail else [])
+        for case in cases])
+
+
+@pytest.fixture(scope='module')
+def corpus_results(request, api_client, auth_key):
+    """{PetCase: BatchItem} для всех случаев, собранных в этом процессе (с учетом -k и воркеров xdist)"""
+    cases = [item.callspec.params['pet_case'] for item in request.session.items
+             if 'pet_case' in getattr(getattr(item, 'callspec', None), 'params', {})]
+    batch = corpus.run_cases(api_client, auth_key, cases).wait()
+    yield {item.item: item for item in batch.items}
+    # удаляем только питомцев корпуса, остальных созданных клиентом воркера убирают их фикстуры
+    pet_ids = [item.result['id'] for item in batch.items if item.ok and isinstance(item.result, dict)]
+    api_client.delete_pets(auth_key, pet_ids, max_workers=16).wait()
+
+
+@pytest.mark.api
+@pytest.mark.manipulations_with_pets
+def test_add_new_pet_from_corpus(pet_case, corpus_results):
+    """Проверяем ответ сервера на добавление питомца с данными случая корпуса"""
+    item = corpus_results[pet_case]
+
+    assert item.error is None
+    assert item.status == pet_case.expect
+    if pet_case.expect == 200:
+        assert item.result['name'] == pet_case.name
+        assert item.result['animal_type'] == pet_case.animal_type
+
+
+def test_entry_expands_to_product_of_values():
+    """Проверяем что строка корпуса разворачивается в произведение значений полей с понятными id"""
+    entry = {'id': 'len', 'name': {'repeat': 'Б', 'times': [1, 300]}, 'animal_type': ['кот', 'пес'], 'age': '1',
+             'expect': 400}
+    cases = list(corpus.expand(entry))
+
+    assert [case.id for case in cases] == ['len-Б-кот', 'len-Б-пес', 'len-len300-кот', 'len-len300-пес']
+    assert len(cases[2].name) == 300 and cases[2].photo is None and cases[2].expect == 400
@@ -1,6 +1,7 @@
 from api import PetFriends
 from settings import valid_email, valid_password
 import os
+import pytest
 
 pf = PetFriends()
 
@@ -177,6 +178,7 @@ def test_add_new_pet_with_png_photo(name='Барбоскин', animal_type='дв
 
 
 
+@pytest.mark.xfail(reason='баг сервера: питомец с пустыми полями создается со статусом 200')
 def test_unsuccessful_add_new_pet_with_empty_values(name='', animal_type='',
                                      age='', pet_photo='images/00013.png'):
     """Проверяем что если отправить пустые значения при создании пета, то сервер вернет ошибку
@@ -212,6 +214,7 @@ def test_add_new_pet_with_huge_values(
     assert status == 200
     assert result['name'] == name
 
+@pytest.mark.xfail(reason='баг сервера: пустые поля при обновлении принимаются со статусом 200')
 def test_unsuccessful_update_pet_info_with_empty_values(name='', animal_type='', age=''):
     """Проверяем невозможность обновления информации о питомце пустыми полями
     И НАХОДИМ БАГ, потому что при отправке пустых полей с сервера приходит 200"""
@@ -9,17 +9,20 @@ pf = PetFriends()
 
 class TestPetFriends:
     @pytest.fixture(autouse=True)
-    def api_client(self):
+    def setup_client(self, api_client, auth_key):
         #setup
-        self.pf = PetFriends()
-        status, self.auth_key = self.pf.get_api_key(valid_email, valid_password)
-        assert status == 200
+        # клиент и ключ - общие на воркер (см. conftest.py), тесты можно гонять параллельно: pytest -n auto
+        self.pf = api_client
+        self.auth_key = auth_key
         yield
 
-    @pytest.fixture()
+    @pytest.fixture(autouse=True)
     def clean_data(self):
+        yield
         #teardown
-        self.pf.delete_pet(self.auth_key)
+        # удаляем питомцев, созданных тестом через клиентов модуля (без запросов, если тест никого не создал)
+        self.pf.cleanup()
+        pf.cleanup()
 
 
     @pytest.mark.auth
@@ -65,48 +68,30 @@ class TestPetFriends:
         assert result['name'] == name
 
     @pytest.mark.api
-    def test_successful_delete_self_pet(self):
+    def test_successful_delete_self_pet(self, own_pet):
         """Проверяем возможность удаления питомца"""
 
-        # Получаем ключ auth_key и запрашиваем список своих питомцев
-        # _, auth_key = pf.get_api_key(valid_email, valid_password)
-        _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
-
-        # Проверяем - если список своих питомцев пустой, то добавляем нового
-        # и опять запрашиваем список своих питомцев
-        if len(my_pets['pets']) == 0:
-            pf.add_new_pet(self.auth_key, "Суперкот", "кот", "3", "images/cat1.jpg")
-            _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
-
-        # Берём id первого питомца из списка и отправляем запрос на удаление
-        pet_id = my_pets['pets'][0]['id']
+        # Удаляем питомца, созданного для этого теста (а не первого из my_pets - его может трогать другой воркер)
+        pet_id = own_pet['id']
         status, _ = pf.delete_pet(self.auth_key, pet_id)
 
-        # Ещё раз запрашиваем список своих питомцев
+        # Запрашиваем список своих питомцев
         _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
 
         # Проверяем что статус ответа равен 200 и в списке питомцев нет id удалённого питомца
         assert status == 200
-        assert pet_id not in my_pets.values()
+        assert pet_id not in [pet['id'] for pet in my_pets['pets']]
 
     @pytest.mark.api
-    def test_successful_update_self_pet_info(self, name='Мурзик', animal_type='Котэ', age=5):
+    def test_successful_update_self_pet_info(self, own_pet, name='Мурзик', animal_type='Котэ', age=5):
         """Проверяем возможность обновления информации о питомце"""
 
-        # Получаем ключ auth_key и список своих питомцев
-        # _, auth_key = pf.get_api_key(valid_email, valid_password)
-        _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
-
-        # Если список не пустой, то пробуем обновить его имя, тип и возраст
-        if len(my_pets['pets']) > 0:
-            status, result = pf.update_pet_info(self.auth_key, my_pets['pets'][0]['id'], name, animal_type, age)
+        # Обновляем имя, тип и возраст питомца, созданного для этого теста
+        status, result = pf.update_pet_info(self.auth_key, own_pet['id'], name, animal_type, age)
 
-            # Проверяем что статус ответа = 200 и имя питомца соответствует заданному
-            assert status == 200
-            assert result['name'] == name
-        else:
-            # если спиок питомцев пустой, то выкидываем исключение с текстом об отсутствии своих питомцев
-            raise Exception("There is no my pets")
+        # Проверяем что статус ответа = 200 и имя питомца соответствует заданному
+        assert status == 200
+        assert result['name'] == name
 
 
 #################################################################
@@ -131,26 +116,17 @@ class TestPetFriends:
         assert result['name'] == name
 
     @pytest.mark.api
-    def test_add_pet_photo(self, pet_photo="images/cat1.jpg"):
+    def test_add_pet_photo(self, own_pet, pet_photo="images/cat1.jpg"):
         """Проверяем что можно добавить пету фото"""
 
         # Получаем полный путь изображения питомца и сохраняем в переменную pet_photo
         pet_photo = os.path.join(os.path.dirname(__file__), pet_photo)
 
-        # Получаем ключ auth_key и сохраняем в переменную
-        # _, auth_key = pf.get_api_key(valid_email, valid_password)
-        _, my_pets = self.pf.get_list_of_pets(self.auth_key, 'my_pets')
-
-        # Если не пустой, то пробуем запостить фото
-        if len(my_pets['pets']) > 0:
-            status, result = pf.add_pet_photo(self.auth_key, my_pets['pets'][0]['id'], pet_photo)
+        # Постим фото питомцу, созданному для этого теста
+        status, result = pf.add_pet_photo(self.auth_key, own_pet['id'], pet_photo)
 
-            # Проверяем что статус ответа = 200
-            assert status == 200
-        else:
-            # если спиок питомцев пустой, то выкидываем исключение
-            # с текстом об отсутствии своих питомцев
-            raise Exception("There is no my pets")
+        # Проверяем что статус ответа = 200
+        assert status == 200
 
     @pytest.mark.api
     def test_add_new_pet_with_invalid_auth_key(self, name='Жерар', animal_type='Sobaken', age='5', pet_photo='images/cat1.jpg'):
@@ -262,27 +238,17 @@ class TestPetFriends:
             # если спиок питомцев пустой, то выкидываем исключение с текстом об отсутствии своих питомцев
             raise Exception("There is no my pets")
     @pytest.mark.api
-    def test_delete_pet_with_wrong_auth_key(self):
+    def test_delete_pet_with_wrong_auth_key(self, own_pet):
         """Проверяем удаление питомцев с невалидным ключом апи"""
 
-        # Получаем ключ auth_key и запрашиваем список своих питомцев
-        # _, auth_key = pf.get_api_key(valid_email, valid_password)
-        _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
-
-        # Проверяем - если список своих питомцев пустой, то добавляем нового
-        # и опять запрашиваем список своих питомцев
-        if len(my_pets['pets']) == 0:
-            pf.add_new_pet(self.auth_key, "Суперкот", "кот", "3", "images/cat1.jpg")
-            _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
-
-        # Берём id первого питомца из списка и отправляем запрос на удаление
-        pet_id = my_pets['pets'][0]['id']
+        # Пробуем удалить питомца, созданного для этого теста, с невалидным ключом
+        pet_id = own_pet['id']
         auth_key = {'key': 'qwe83'}
         status, _ = pf.delete_pet(auth_key, pet_id)
 
-        # # Ещё раз запрашиваем список своих питомцев
-        # _, my_pets = pf.get_list_of_pets(auth_key, "my_pets")
+        # Ещё раз запрашиваем список своих питомцев
+        _, my_pets = pf.get_list_of_pets(self.auth_key, "my_pets")
 
-        # Проверяем что статус ответа равен 403 и в списке питомцев нет id удалённого питомца
+        # Проверяем что статус ответа равен 403 и питомец остался в списке
         assert status == 403
-        assert pet_id not in my_pets.values()
\ No newline at end of file
+        assert pet_id in [pet['id'] for pet in my_pets['pets']]
\ No newline at end of file
@@ -0,0 +1,56 @@
+import pytest
+
+from pet_mirror import PetMirror
+from settings import valid_email, valid_password
+
+
+@pytest.fixture()
+def server(private_server):
+    # отдельный сервер: на общем к этому моменту накоплены питомцы с фото из других тестов
+    return private_server(seed_pets=3)
+
+
+@pytest.fixture()
+def mirror(server, fake_client, tmp_path):
+    pf = fake_client(server)
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    with PetMirror(pf, auth_key, str(tmp_path / 'pets.sqlite')) as pet_mirror:
+        yield pf, auth_key, pet_mirror
+
+
+def test_sync_and_lookup(mirror):
+    """Проверяем что после сверки зеркало совпадает со списком my_pets и ищет по имени и виду"""
+    pf, auth_key, pet_mirror = mirror
+    pet_mirror.sync()
+    _, my_pets = pf.get_list_of_pets(auth_key, 'my_pets')
+    assert sorted(pet_mirror.ids()) == sorted(pet['id'] for pet in my_pets['pets'])
+    pet = my_pets['pets'][0]
+    assert pet_mirror.get(pet['id']) == {field: pet[field] for field in pet_mirror.get(pet['id'])}
+    assert pet['id'] in [p['id'] for p in pet_mirror.find(name=pet['name'], animal_type=pet['animal_type'])]
+    assert pet_mirror.sync() == {'added': 0, 'updated': 0, 'removed': 0}
+
+
+def test_client_writes_are_applied_incrementally(mirror):
+    """Проверяем что добавление, изменение и удаление через клиент видны в зеркале без сверки"""
+    pf, auth_key, pet_mirror = mirror
+    pet_mirror.sync()
+    _, pet = pf.add_new_pet_without_photo(auth_key, 'Зеркало', 'кот', '1')
+    assert pet_mirror.get(pet['id'])['name'] == 'Зеркало'
+
+    pf.update_pet_info(auth_key, pet['id'], 'Отражение', 'кот', '2', as_records=True)
+    assert pet_mirror.get(pet['id'], as_records=True).name == 'Отражение'
+
+    pf.delete_pet(auth_key, pet['id'])
+    assert pet['id'] not in pet_mirror
+    assert pet_mirror.sync() == {'added': 0, 'updated': 0, 'removed': 0}
+
+
+def test_sync_picks_up_foreign_changes(mirror, server, fake_client):
+    """Проверяем что сверка находит питомцев, измененных в обход клиента"""
+    pf, auth_key, pet_mirror = mirror
+    pet_mirror.sync()
+    _, pet = fake_client(server).add_new_pet_without_photo(auth_key, 'Чужой', 'пес', '3')
+    assert pet['id'] not in pet_mirror
+    assert pet_mirror.sync()['added'] == 1
+    assert pet_mirror.find(name='Чужой')[0]['id'] == pet['id']
+    pf.delete_pet(auth_key, pet['id'])
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from settings import valid_email, valid_password
+
+
+@pytest.fixture()
+def client(private_server, fake_client):
+    # отдельный сервер, чтобы уборка по префиксу и возрасту не зависела от питомцев других тестов
+    pf = fake_client(private_server(seed_pets=0))
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    return pf, auth_key
+
+
+def my_pet_names(pf, auth_key) -> list:
+    return sorted(pet['name'] for pet in pf.iter_pets(auth_key, 'my_pets'))
+
+
+def test_cleanup_deletes_created_pets(client):
+    """Проверяем что cleanup удаляет всех созданных через клиент питомцев, кроме уже удаленных"""
+    pf, auth_key = client
+    pets = [{'name': f'Реестр {n}', 'animal_type': 'кот', 'age': n} for n in range(10)]
+    created = [item.result['id'] for item in pf.add_pets(auth_key, pets).wait().items]
+    assert sorted(pf.created.ids()) == sorted(created)
+
+    pf.delete_pet(auth_key, created[0])
+    assert created[0] not in pf.created
+
+    assert pf.cleanup() == {'total': 9, 'succeeded': 9, 'failed': 0}
+    assert len(pf.created) == 0
+    assert my_pet_names(pf, auth_key) == []
+    assert pf.cleanup()['total'] == 0
+
+
+def test_failed_deletes_stay_tracked(client):
+    """Проверяем что питомец, которого не удалось удалить, остается в реестре"""
+    pf, auth_key = client
+    _, pet = pf.add_new_pet_without_photo(auth_key, 'Упрямый', 'кот', '1')
+    pf.created.add('wrong-key', pf.created.take()[auth_key['key']][0])
+    assert pf.cleanup()['failed'] == 1
+    assert pet['id'] in pf.created
+
+
+def test_sweep_by_prefix_and_age(client):
+    """Проверяем уборку остатков по префиксу имени и по возрасту"""
+    pf, auth_key = client
+    for name in ('run1-a', 'run1-b', 'run2-a'):
+        pf.add_new_pet_without_photo(auth_key, name, 'кот', '1')
+    assert pf.sweep(auth_key).stats()['total'] == 0
+    assert pf.sweep(auth_key, prefix='run1-').stats()['succeeded'] == 2
+    assert my_pet_names(pf, auth_key) == ['run2-a']
+
+    assert pf.sweep(auth_key, older_than=60).stats()['total'] == 0
+    time.sleep(0.05)
+    assert pf.sweep(auth_key, older_than=0.01).stats()['succeeded'] == 1
+    assert my_pet_names(pf, auth_key) == []
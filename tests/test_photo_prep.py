@@ -0,0 +1,98 @@
+import io
+import os
+
+import pytest
+
+from photo_prep import PhotoPreprocessor
+
+Image = pytest.importorskip('PIL.Image')
+
+images = os.path.join(os.path.dirname(__file__), 'images')
+png_photo = os.path.join(images, '00013.png')
+jpg_photo = os.path.join(images, 'P1040103.jpg')
+
+
+def test_large_photos_are_downscaled(tmp_path):
+    """Проверяем что большие фото уменьшаются до max_size и становятся заметно легче"""
+    with PhotoPreprocessor(max_size=800, cache_dir=str(tmp_path)) as prep:
+        for path in (png_photo, jpg_photo):
+            result = prep.process(path)
+            assert len(result) < os.path.getsize(path) / 4
+            with Image.open(io.BytesIO(result)) as image:
+                assert max(image.size) <= 800
+    assert prep.stats()['processed'] == 2
+
+
+def test_metadata_is_stripped(tmp_path):
+    """Проверяем что EXIF удаляется, а поворот из EXIF применяется к картинке"""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повернуть на 90 градусов
+    exif[0x010F] = 'Camera maker'
+    source = io.BytesIO()
+    Image.new('RGB', (40, 20), 'red').save(source, 'JPEG', exif=exif)
+
+    result = PhotoPreprocessor(cache_dir=None).process(source.getvalue())
+    with Image.open(io.BytesIO(result)) as image:
+        assert not image.getexif()
+        assert image.size == (20, 40)
+
+
+def test_cache_is_shared_between_runs(tmp_path):
+    """Проверяем что одинаковое фото пережимается один раз, в том числе новым экземпляром с тем же кэшем"""
+    first = PhotoPreprocessor(cache_dir=str(tmp_path))
+    result = first.process(png_photo)
+    assert first.process(png_photo) == result
+    second = PhotoPreprocessor(cache_dir=str(tmp_path))
+    with open(png_photo, 'rb') as f:
+        assert second.process(f) == result
+    assert (first.stats()['cache_hits'], second.stats()['processed'], second.stats()['cache_hits']) == (1, 0, 1)
+
+
+def test_process_pool(tmp_path):
+    """Проверяем пакетную подготовку в пуле процессов: порядок результатов сохраняется,
+    а одинаковое фото в пачке пережимается один раз"""
+    with PhotoPreprocessor(max_size=300, cache_dir=str(tmp_path), workers=2) as prep:
+        results = prep.process_many([png_photo, jpg_photo, png_photo])
+    assert results[0] == results[2] != results[1]
+    assert (prep.stats()['processed'], prep.stats()['cache_hits']) == (2, 1)
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='права каталога проверяются только на POSIX')
+def test_cache_is_private(tmp_path):
+    """Проверяем что каталог кэша создается закрытым, файлы читает только владелец,
+    а каталогу, открытому на запись другим, кэш не доверяет"""
+    cache_dir = tmp_path / 'photos'
+    prep = PhotoPreprocessor(max_size=300, cache_dir=str(cache_dir))
+    result = prep.process(png_photo)
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+    [cached] = cache_dir.iterdir()
+    assert cached.stat().st_mode & 0o777 == 0o600
+
+    # подложенный файл в общем каталоге не должен попасть в загрузку
+    cached.write_bytes(b'planted')
+    cache_dir.chmod(0o777)
+    shared = PhotoPreprocessor(max_size=300, cache_dir=str(cache_dir))
+    assert shared.process(png_photo) == result
+    assert shared.stats()['cache_hits'] == 0
+
+
+def test_source_is_untouched_without_pillow():
+    """Проверяем что без Pillow путь и файл возвращаются как есть и не читаются в память"""
+    prep = PhotoPreprocessor(cache_dir=None)
+    prep.available = False
+    with open(png_photo, 'rb') as f:
+        assert prep.process(png_photo) == png_photo
+        assert prep.process(f) is f and f.tell() == 0
+    assert prep.stats()['bytes_in'] == 0
+
+
+def test_client_uploads_prepared_photo(fake_client, tmp_path):
+    from settings import valid_email, valid_password
+
+    pf = fake_client(photo_preprocessor=PhotoPreprocessor(max_size=200, cache_dir=str(tmp_path)))
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    status, pet = pf.add_new_pet(auth_key, 'Сжатый', 'кот', '1', png_photo)
+    pf.cleanup()
+    assert status == 200
+    assert pet['pet_photo'].startswith('data:image/jpeg;base64,')
+    assert len(pet['pet_photo']) < 100000
@@ -0,0 +1,85 @@
+import pytest
+
+import pipeline
+from pipeline import ApiCall, Pipeline
+from settings import valid_email, valid_password
+
+
+@pytest.fixture()
+def pf(fake_client):
+    return fake_client()
+
+
+def test_every_method_goes_through_stages(pf):
+    """Проверяем что все методы клиента проходят через одни и те же стадии, включая добавленную"""
+    seen = []
+
+    def trace(client, call, proceed):
+        seen.append((call.name, call.method, call.headers.get('auth_key')))
+        return proceed(call)
+
+    pf.pipeline = Pipeline(pf, pipeline.STAGES + (trace,))
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    pf.get_list_of_pets(auth_key, 'my_pets')
+    _, pet = pf.add_new_pet_without_photo(auth_key, 'Конвейер', 'кот', '1')
+    pf.update_pet_info(auth_key, pet['id'], 'Конвейер', 'кот', '2')
+    pf.delete_pet(auth_key, pet['id'])
+
+    assert [name for name, _, _ in seen] == ['get_api_key', 'get_list_of_pets', 'add_new_pet_without_photo',
+                                            'update_pet_info', 'delete_pet']
+    assert [method for _, method, _ in seen] == ['GET', 'GET', 'POST', 'PUT', 'DELETE']
+    assert all(key == auth_key['key'] for _, _, key in seen[1:])
+    assert pet['id'] not in pf.created
+
+
+def test_stage_can_answer_without_request(pf):
+    """Проверяем что стадия может вернуть готовый ответ, а records и хуки отрабатывают над ним"""
+    def stub(client, call, proceed):
+        return 200, {'pets': [{'id': '1', 'name': 'Заглушка'}]}
+
+    def no_network(client, call):
+        pytest.fail('запрос ушел в сеть')
+
+    pf.pipeline = Pipeline(pf, pipeline.STAGES[:pipeline.STAGES.index(pipeline.decode)] + (stub,), no_network)
+    calls = []
+    pf.add_hook(post=calls.append)
+
+    status, pets = pf.get_list_of_pets({'key': 'x'}, as_records=True)
+
+    assert status == 200 and pets[0].name == 'Заглушка'
+    assert calls[0].kwargs == {'filter': '', 'auth_key': {'key': 'x'}}
+
+
+def test_call_arguments_use_method_parameter_names():
+    call = ApiCall('update_pet_info', 'PUT', 'api/pets/1', {'key': 'k'}, data={'name': 'a'}, pet_id='1')
+    assert call.arguments() == {'name': 'a', 'auth_key': {'key': 'k'}, 'pet_id': '1'}
+
+
+def test_overhead_benchmark_reports_both_paths():
+    result = pipeline.overhead(calls=20)
+    assert result['direct_us'] > 0 and result['pipeline_us'] > 0
+
+
+def test_streamed_pets_go_through_stages(pf):
+    """Проверяем что iter_pets идет через конвейер: хуки видят вызов, а поток закрывается при остановке"""
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    _, first = pf.add_new_pet_without_photo(auth_key, 'Поток 1', 'кот', '1')
+    pf.add_new_pet_without_photo(auth_key, 'Поток 2', 'кот', '1')
+    calls, closed = [], []
+
+    def trace(client, call, proceed):
+        # стоит над log: запись в лог о потоке уже назначена на закрытие, дополняем ее
+        status, stream = proceed(call)
+        log_stream = stream.on_close
+        stream.on_close = lambda stream: (closed.append(stream.count), log_stream(stream))
+        return status, stream
+
+    log_index = pipeline.STAGES.index(pipeline.log)
+    pf.pipeline = Pipeline(pf, pipeline.STAGES[:log_index] + (trace,) + pipeline.STAGES[log_index:])
+    pf.add_hook(post=calls.append)
+    pets = list(pf.iter_pets(auth_key, 'my_pets', stop_at_id=first['id'], as_records=True))
+
+    assert pets[-1].id == first['id']
+    assert closed == [len(pets)]
+    assert [(call.method, call.status, call.kwargs['filter']) for call in calls[-1:]] == [('iter_pets', 200, 'my_pets')]
+    pf.cleanup()
@@ -0,0 +1,57 @@
+import multiprocessing
+import time
+
+from rate_limit import RateLimiter
+from settings import valid_email, valid_password
+
+
+def test_endpoint_matching():
+    """Проверяем выбор лимита по самому длинному префиксу пути"""
+    limiter = RateLimiter({'api/key': (1, 2), 'api/pets': 20, 'api/pets/set_photo': 5})
+    assert limiter.endpoint('http://host/api/key')[:2] == ('api/key', 1.0)
+    assert limiter.endpoint('http://host/api/pets?filter=my_pets')[0] == 'api/pets'
+    assert limiter.endpoint('http://host/api/pets/set_photo/123')[0] == 'api/pets/set_photo'
+    assert limiter.endpoint('http://host/api/create_pet_simple') is None
+    assert RateLimiter(default=10).endpoint('http://host/api/create_pet_simple')[0] == '*'
+
+
+def test_burst_then_rate():
+    """Проверяем что burst запросов проходит сразу, а дальше - не чаще rate в секунду"""
+    limiter = RateLimiter({'api/key': (20, 3)})
+    started = time.perf_counter()
+    for _ in range(7):
+        limiter.acquire('http://host/api/key')
+    elapsed = time.perf_counter() - started
+    assert 0.18 <= elapsed < 0.5
+    assert limiter.stats()['acquired'] == 7
+    assert limiter.stats()['delayed'] == 4
+
+
+def _acquire_many(path, count):
+    limiter = RateLimiter({'api/pets': (20, 1)}, path=path)
+    for _ in range(count):
+        limiter.acquire('http://host/api/pets')
+
+
+def test_budget_is_shared_between_processes(tmp_path):
+    """Проверяем что с path процессы делят один бюджет: 2 процесса по 5 запросов при 20 rps - не быстрее 0.45 с"""
+    path = str(tmp_path / 'limits.json')
+    started = time.perf_counter()
+    processes = [multiprocessing.Process(target=_acquire_many, args=(path, 5)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0, 0]
+    assert time.perf_counter() - started >= 0.45
+
+
+def test_client_is_limited(fake_client):
+    """Проверяем что лимит действует на запросы клиента"""
+    limiter = RateLimiter({'api/key': (10, 1)})
+    pf = fake_client(rate_limiter=limiter)
+    started = time.perf_counter()
+    for _ in range(3):
+        assert pf.get_api_key(valid_email, valid_password)[0] == 200
+    assert time.perf_counter() - started >= 0.2
+    assert limiter.stats()['acquired'] == 3
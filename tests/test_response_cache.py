@@ -0,0 +1,68 @@
+import pytest
+
+from response_cache import ResponseCache
+from settings import valid_email, valid_password
+
+
+@pytest.fixture()
+def client(fake_client):
+    cache = ResponseCache(ttl=60)
+    pf = fake_client(response_cache=cache)
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    return pf, auth_key, cache
+
+
+def test_repeated_list_is_served_from_cache(client):
+    """Проверяем что повторный запрос списка не идет на сервер и результат можно менять без порчи кэша"""
+    pf, auth_key, cache = client
+    requests_before = pf.connection_stats()['requests']
+    status, first = pf.get_list_of_pets(auth_key, 'my_pets')
+    first['pets'].clear()
+    status2, second = pf.get_list_of_pets(auth_key, 'my_pets')
+    assert status == status2 == 200
+    assert second['pets']
+    assert pf.connection_stats()['requests'] == requests_before + 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['bytes_saved'] > 0 and stats['hit_ratio'] == 0.5
+
+
+def test_writes_invalidate_cache(client):
+    """Проверяем что добавление и удаление питомца сразу видны в закэшированном списке"""
+    pf, auth_key, cache = client
+    pf.get_list_of_pets(auth_key, 'my_pets')
+    _, pet = pf.add_new_pet_without_photo(auth_key, 'Кэш', 'кот', '1')
+    _, my_pets = pf.get_list_of_pets(auth_key, 'my_pets')
+    assert pet['id'] in [p['id'] for p in my_pets['pets']]
+
+    pf.delete_pet(auth_key, pet['id'])
+    _, my_pets = pf.get_list_of_pets(auth_key, 'my_pets', as_records=True)
+    assert my_pets.find(pet['id']) is None
+    assert cache.stats()['invalidations'] == 2
+
+
+def test_stale_entry_is_revalidated_by_etag(client):
+    """Проверяем что устаревший ответ перепроверяется по ETag и сервер отвечает 304 без тела"""
+    pf, auth_key, cache = client
+    cache.ttl = 0
+    calls = []
+    pf.add_hook(post=calls.append)
+    pf.get_list_of_pets(auth_key, 'my_pets')
+    status, result = pf.get_list_of_pets(auth_key, 'my_pets')
+    assert status == 200 and 'pets' in result
+    assert cache.stats()['revalidated'] == 1
+    assert calls[1].response_bytes == 0
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+
+    class Response:
+        status_code = 200
+        headers = {}
+        content = b'{}'
+
+    for key in [('k', 'a'), ('k', 'b'), ('k', 'a'), ('k', 'c')]:
+        cache.fetch(key, lambda headers: Response())
+    assert list(cache._entries) == [('k', 'a'), ('k', 'c')]
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from retry import CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+from settings import valid_email, valid_password
+
+
+def test_retries_idempotent_request_until_success(local_server, fake_client):
+    """Проверяем что GET после двух 503 повторяется и возвращает 200, а число повторов видно в замерах"""
+    calls = []
+    pf = fake_client(retry_policy=RetryPolicy(backoff_factor=0.01))
+    pf.add_hook(post=calls.append)
+    local_server.state.fail_next(503, count=2)
+    status, result = pf.get_api_key(valid_email, valid_password)
+    assert status == 200
+    assert 'key' in result
+    assert calls[0].retries == 2
+
+
+def test_post_is_not_retried(local_server, fake_client):
+    """Проверяем что POST, дошедший до сервера, не повторяется - питомец не создастся дважды"""
+    pf = fake_client(retry_policy=RetryPolicy(backoff_factor=0.01))
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    local_server.state.fail_next(503)
+    status, _ = pf.add_new_pet_without_photo(auth_key, 'Повтор', 'кот', '1')
+    assert status == 503
+
+
+def test_retry_after_is_respected(local_server, fake_client):
+    """Проверяем что задержка берется из заголовка Retry-After"""
+    pf = fake_client(retry_policy=RetryPolicy(backoff_factor=0, jitter=False))
+    local_server.state.fail_next(429, headers={'Retry-After': '0.3'})
+    started = time.perf_counter()
+    status, _ = pf.get_api_key(valid_email, valid_password)
+    assert status == 200
+    assert time.perf_counter() - started >= 0.3
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(5)] == [1, 2, 4, 5, 5]
+    assert parse_retry_after('2') == 2.0
+    assert parse_retry_after('soon') is None
+
+
+def test_circuit_breaker_opens_and_recovers(local_server, fake_client):
+    """Проверяем что после серии 5xx предохранитель отклоняет запросы, а после паузы снова пропускает"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    pf = fake_client(circuit_breaker=breaker)
+    local_server.state.fail_next(500, count=2)
+    assert pf.get_api_key(valid_email, valid_password)[0] == 500
+    assert pf.get_api_key(valid_email, valid_password)[0] == 500
+    with pytest.raises(CircuitOpenError):
+        pf.get_api_key(valid_email, valid_password)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.rejected == 1
+
+    time.sleep(0.25)
+    assert pf.get_api_key(valid_email, valid_password)[0] == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_with_unexpected_error_does_not_wedge_breaker(local_server, fake_client, monkeypatch):
+    """Проверяем что пробный запрос, упавший не сетевой ошибкой, не оставляет предохранитель закрытым навсегда"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    pf = fake_client(circuit_breaker=breaker)
+    local_server.state.fail_next(500)
+    assert pf.get_api_key(valid_email, valid_password)[0] == 500
+    time.sleep(0.1)
+
+    send_once = pf.adapter._send_once
+    monkeypatch.setattr(pf.adapter, '_send_once', lambda *args, **kwargs: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        pf.get_api_key(valid_email, valid_password)
+    monkeypatch.setattr(pf.adapter, '_send_once', send_once)
+
+    time.sleep(0.1)
+    assert pf.get_api_key(valid_email, valid_password)[0] == 200
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from settings import valid_email, valid_password
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_are_coalesced():
+    """Проверяем что одновременные вызовы с одним ключом выполняются один раз и все получают результат"""
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return 'result'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(results) == [('result', False)] + [('result', True)] * 4
+    assert flight.stats() == {'executed': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    with pytest.raises(ZeroDivisionError):
+        flight.do('key', lambda: 1 / 0)
+    assert flight.do('key', lambda: 'ok') == ('ok', False)
+
+
+def test_async_calls_are_coalesced():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do('key', slow) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ['result'] * 5
+    assert flight.stats()['coalesced'] == 4
+
+
+def test_client_coalesces_identical_reads(fake_client):
+    """Проверяем что одновременные одинаковые get_list_of_pets из потоков уходят на сервер одним запросом,
+    а результаты у вызывающих независимые"""
+    pf = fake_client(single_flight=True, pool_maxsize=20)
+    _, auth_key = pf.get_api_key(valid_email, valid_password)
+    requests_before = pf.connection_stats()['requests']
+    barrier = threading.Barrier(20)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(pf.get_list_of_pets(auth_key, 'my_pets'))
+
+    threads = [threading.Thread(target=read) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = pf.single_flight.stats()
+    requests_made = pf.connection_stats()['requests'] - requests_before
+    assert [status for status, _ in results] == [200] * 20
+    assert stats['executed'] + stats['coalesced'] == 21
+    assert requests_made == stats['executed'] - 1 < 20
+    assert results[0][1] is not results[-1][1]
+
+
+def test_async_client_coalesces_identical_reads(local_server):
+    pytest.importorskip('aiohttp')
+    from async_api import AsyncPetFriends
+
+    async def scenario():
+        async with AsyncPetFriends(base_url=local_server.url, single_flight=True) as pf:
+            keys = await asyncio.gather(*[pf.get_api_key(valid_email, valid_password) for _ in range(10)])
+            return keys, pf.single_flight.stats()
+
+    keys, stats = asyncio.run(scenario())
+    assert [status for status, _ in keys] == [200] * 10
+    assert stats == {'executed': 1, 'coalesced': 9, 'in_flight': 0}